@@ -6,10 +6,23 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import sys
+
 from .client import InfluxDBClient
-from .dataframe_client import DataFrameClient
 from .helper import SeriesHelper
 
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        """Import DataFrameClient, and with it pandas, on first use."""
+        if name == 'DataFrameClient':
+            global DataFrameClient
+            from .dataframe_client import DataFrameClient
+            return DataFrameClient
+        raise AttributeError(
+            "module {0!r} has no attribute {1!r}".format(__name__, name))
+else:
+    from .dataframe_client import DataFrameClient
+
 
 __all__ = [
     'InfluxDBClient',
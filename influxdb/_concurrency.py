@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Bounded concurrent batch writes shared by the clients."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def write_concurrently(write, batches, max_workers):
+    """Call ``write`` on every batch from up to ``max_workers`` threads.
+
+    A batch is only taken from ``batches`` once fewer than ``max_workers``
+    writes are in flight, so generators are still consumed lazily and
+    memory does not grow with the whole dataset. The first failure is
+    raised; batches which have not started yet are skipped.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        try:
+            for batch in batches:
+                if len(pending) >= max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                pending.add(executor.submit(write, batch))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
@@ -402,7 +402,7 @@ class DataFrameClient(InfluxDBClient):
         elif global_tags:
             tag_string = ''.join(
                 [",{}={}".format(k, _escape_tag(v))
-                 if v not in [None, ''] else ""
+                 if v not in (None, '') else ""
                  for k, v in sorted(global_tags.items())]
             )
             tags = pd.Series(tag_string, index=dataframe.index)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""JSON helpers shared by the clients, backed by orjson when available.
+
+Both backends produce the same output for the same input:
+
+* NaN and infinite floats are encoded as ``null``, since JSON has no
+  literal for them.
+* Objects the standard library cannot encode, such as ``datetime``, raise
+  :class:`TypeError`; integers wider than 64 bits are encoded exactly.
+* ``NaN``/``Infinity`` literals in a response decode to floats.
+
+Differences that remain with orjson: it also encodes NumPy arrays, UUIDs,
+enums and dataclasses, and it decodes integers wider than 64 bits, which
+InfluxDB never sends, as floats.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import math
+
+
+def _finite(obj):
+    """Return ``obj`` with NaN and infinite floats replaced by None."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+def _stdlib_dumps(obj):
+    """Serialize ``obj`` to compact UTF-8 encoded JSON bytes."""
+    try:
+        data = json.dumps(obj, ensure_ascii=False, separators=(',', ':'),
+                          allow_nan=False)
+    except ValueError:
+        # Rare, so only walk the object once it is known to hold NaN/inf
+        data = json.dumps(_finite(obj), ensure_ascii=False,
+                          separators=(',', ':'))
+    return data.encode('utf-8')
+
+
+def _stdlib_loads(data):
+    """Deserialize JSON from ``bytes`` or ``str``."""
+    return json.loads(data)
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+    dumps = _stdlib_dumps
+    loads = _stdlib_loads
+else:
+    # Pass datetimes through so that they fail like with the stdlib
+    _DUMPS_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY |
+                      orjson.OPT_PASSTHROUGH_DATETIME)
+
+    def _orjson_dumps(obj):
+        """Serialize ``obj`` to compact UTF-8 encoded JSON bytes."""
+        try:
+            return orjson.dumps(obj, option=_DUMPS_OPTIONS)
+        except orjson.JSONEncodeError:
+            # orjson rejects integers wider than 64 bits; let the stdlib
+            # encode them, or raise its own error for unsupported types
+            return _stdlib_dumps(obj)
+
+    def _orjson_loads(data):
+        """Deserialize JSON from ``bytes`` or ``str``."""
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN and Infinity literals
+            return _stdlib_loads(data)
+
+    dumps = _orjson_dumps
+    loads = _orjson_loads
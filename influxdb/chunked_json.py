@@ -11,7 +11,11 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import codecs
 import json
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
 
 
 def loads(s):
@@ -25,3 +29,40 @@ def loads(s):
             raise ValueError('no JSON object found at %i' % pos)
         yield obj
         s = s[pos:]
+
+
+def iterloads(chunks):
+    """Generate a sequence of JSON values from an iterable of byte chunks.
+
+    Values are yielded as soon as they have been received completely, so
+    the whole payload never has to be buffered and decoded at once.
+    """
+    _decoder = json.JSONDecoder()
+    _utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    retry_len = 0
+
+    for chunk in chunks:
+        buf += _utf8.decode(chunk)
+        if len(buf) < retry_len:
+            continue
+
+        incomplete = False
+        pos = _WHITESPACE.match(buf).end()
+        while pos < len(buf):
+            try:
+                obj, pos = _decoder.raw_decode(buf, pos)
+            except ValueError:
+                incomplete = True
+                break
+            yield obj
+            pos = _WHITESPACE.match(buf, pos).end()
+
+        buf = buf[pos:]
+        # Wait for a partial value to double in size before parsing it
+        # again, so large values are not re-parsed on every chunk
+        retry_len = 2 * len(buf) if incomplete else 0
+
+    buf = (buf + _utf8.decode(b'', final=True)).strip()
+    for obj in loads(buf):
+        yield obj
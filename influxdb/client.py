@@ -9,25 +9,93 @@ from __future__ import unicode_literals
 import datetime
 import gzip
 import itertools
-import io
-import json
 import random
 import socket
 import struct
 import time
+from functools import partial
 from itertools import chain, islice
+from urllib.parse import urlparse
 
 import msgpack
 import requests
 import requests.exceptions
 from requests.adapters import HTTPAdapter
-from six.moves.urllib.parse import urlparse
 
+from influxdb import _jsonlib
+from influxdb._concurrency import write_concurrently
 from influxdb.line_protocol import make_lines, quote_ident, quote_literal
 from influxdb.resultset import ResultSet
 from .exceptions import InfluxDBClientError
 from .exceptions import InfluxDBServerError
 
+# InfluxQL statement templates. Identifiers and literals must be passed
+# through quote_ident() / quote_literal() before being formatted in.
+_CREATE_DATABASE = "CREATE DATABASE {0}"
+_DROP_DATABASE = "DROP DATABASE {0}"
+_DROP_MEASUREMENT = "DROP MEASUREMENT {0}"
+_CREATE_RETENTION_POLICY = (
+    "CREATE RETENTION POLICY {0} ON {1} "
+    "DURATION {2} REPLICATION {3} SHARD DURATION {4}"
+)
+_ALTER_RETENTION_POLICY = "ALTER RETENTION POLICY {0} ON {1}"
+_DROP_RETENTION_POLICY = "DROP RETENTION POLICY {0} ON {1}"
+_SHOW_RETENTION_POLICIES = "SHOW RETENTION POLICIES ON {0}"
+_CREATE_USER = "CREATE USER {0} WITH PASSWORD {1}"
+_DROP_USER = "DROP USER {0}"
+_SET_PASSWORD = "SET PASSWORD FOR {0} = {1}"
+_GRANT_ADMIN = "GRANT ALL PRIVILEGES TO {0}"
+_REVOKE_ADMIN = "REVOKE ALL PRIVILEGES FROM {0}"
+_GRANT_PRIVILEGE = "GRANT {0} ON {1} TO {2}"
+_REVOKE_PRIVILEGE = "REVOKE {0} ON {1} FROM {2}"
+_SHOW_GRANTS = "SHOW GRANTS FOR {0}"
+_CREATE_CONTINUOUS_QUERY = (
+    "CREATE CONTINUOUS QUERY {0} ON {1}{2} BEGIN {3} END"
+)
+_DROP_CONTINUOUS_QUERY = "DROP CONTINUOUS QUERY {0} ON {1}"
+_TAG_EQUALS = "{0}={1}"
+
+_TIME_PRECISIONS = frozenset(('n', 'u', 'ms', 's', 'm', 'h', None))
+_CONSISTENCY_LEVELS = frozenset(('any', 'one', 'quorum', 'all', None))
+
+_GZIP_HEADERS = {
+    'Accept-Encoding': 'gzip',
+    'Content-Encoding': 'gzip',
+}
+
+# Level 1 compresses line protocol about 8x at several hundred MB/s; level
+# 9 only shaves off another fifth of the bytes but is seven times slower.
+_GZIP_LEVEL = 1
+
+# Keep each UDP datagram within a typical Ethernet MTU so it is never
+# fragmented on the way to the server
+_UDP_PAYLOAD_SIZE = 1400
+
+
+def _tag_filter(tags):
+    """Build an escaped ``WHERE`` clause body from a dict of tags."""
+    return ' AND '.join(_TAG_EQUALS.format(quote_ident(k), quote_literal(v))
+                        for k, v in tags.items())
+
+
+def _udp_datagrams(lines):
+    """Pack line protocol lines into datagrams of _UDP_PAYLOAD_SIZE bytes.
+
+    A line longer than the limit is sent on its own.
+    """
+    datagram = []
+    size = 0
+    for line in lines:
+        line = line.encode('utf-8') + b'\n'
+        if datagram and size + len(line) > _UDP_PAYLOAD_SIZE:
+            yield b''.join(datagram)
+            datagram = []
+            size = 0
+        datagram.append(line)
+        size += len(line)
+    if datagram:
+        yield b''.join(datagram)
+
 
 class InfluxDBClient(object):
     """InfluxDBClient primary client object to connect InfluxDB.
@@ -143,6 +211,8 @@ class InfluxDBClient(object):
 
         if use_udp:
             self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._udp_address = (self.__host, self.__udp_port)
+        self._udp_connected = False
 
         if not path:
             self.__path = ''
@@ -176,14 +246,22 @@ class InfluxDBClient(object):
             self._host,
             self._port,
             self._path)
+        self._url_prefix = self.__baseurl + '/'
 
         if headers is None:
             headers = {}
         headers.setdefault('Content-Type', 'application/json')
         headers.setdefault('Accept', 'application/x-msgpack')
+        self._gzip = gzip
+        if gzip:
+            # Receive and send compressed data
+            headers.update(_GZIP_HEADERS)
         self._headers = headers
 
-        self._gzip = gzip
+        # Writes always send a line protocol body; build their headers once
+        # rather than copying self._headers on every write() call.
+        self._write_headers = headers.copy()
+        self._write_headers['Content-Type'] = 'application/octet-stream'
 
     def __enter__(self):
         """Enter function as used by context manager."""
@@ -287,8 +365,9 @@ class InfluxDBClient(object):
         :type method: str
         :param params: additional parameters for the request, defaults to None
         :type params: dict
-        :param data: the data of the request, defaults to None
-        :type data: str
+        :param data: the data of the request, defaults to None. Dicts and
+            lists are serialized to JSON
+        :type data: str, bytes, dict or list
         :param stream: True if a query uses chunked responses
         :type stream: bool
         :param expected_response_code: the expected response code of
@@ -303,33 +382,21 @@ class InfluxDBClient(object):
         :raises InfluxDBClientError: if the response code is not the
             same as `expected_response_code` and is not a server error code
         """
-        url = "{0}/{1}".format(self._baseurl, url)
+        url = self._url_prefix + url
 
         if headers is None:
             headers = self._headers
-
-        if params is None:
-            params = {}
+        elif self._gzip and headers is not self._write_headers:
+            # The write headers already carry the gzip headers; copy any
+            # other dict rather than modifying the caller's
+            headers = dict(headers)
+            headers.update(_GZIP_HEADERS)
 
         if isinstance(data, (dict, list)):
-            data = json.dumps(data)
+            data = _jsonlib.dumps(data)
 
-        if self._gzip:
-            # Receive and send compressed data
-            headers.update({
-                'Accept-Encoding': 'gzip',
-                'Content-Encoding': 'gzip',
-            })
-            if data is not None:
-                # For Py 2.7 compatability use Gzipfile
-                compressed = io.BytesIO()
-                with gzip.GzipFile(
-                    compresslevel=9,
-                    fileobj=compressed,
-                    mode='w'
-                ) as f:
-                    f.write(data)
-                data = compressed.getvalue()
+        if self._gzip and data is not None:
+            data = gzip.compress(data, compresslevel=_GZIP_LEVEL)
 
         # Try to send the request more than once by default (see #103)
         retry = True
@@ -375,7 +442,7 @@ class InfluxDBClient(object):
 
         def reformat_error(response):
             if response._msgpack:
-                return json.dumps(response._msgpack, separators=(',', ':'))
+                return _jsonlib.dumps(response._msgpack).decode('utf-8')
             else:
                 return response.content
 
@@ -406,9 +473,6 @@ class InfluxDBClient(object):
         :returns: True, if the write operation is successful
         :rtype: bool
         """
-        headers = self._headers.copy()
-        headers['Content-Type'] = 'application/octet-stream'
-
         if params:
             precision = params.get('precision')
         else:
@@ -427,16 +491,14 @@ class InfluxDBClient(object):
             params=params,
             data=data,
             expected_response_code=expected_response_code,
-            headers=headers
+            headers=self._write_headers
         )
         return True
 
     @staticmethod
     def _read_chunked_response(response, raise_errors=True):
         for line in response.iter_lines():
-            if isinstance(line, bytes):
-                line = line.decode('utf-8')
-            data = json.loads(line)
+            data = _jsonlib.loads(line)
             result_set = {}
             for result in data.get('results', []):
                 for _key in result:
@@ -507,13 +569,13 @@ class InfluxDBClient(object):
         :returns: the queried data
         :rtype: :class:`~.ResultSet`
         """
-        if params is None:
-            params = {}
+        # Copy so the caller's dict is not modified
+        params = dict(params) if params else {}
 
         if bind_params is not None:
-            params_dict = json.loads(params.get('params', '{}'))
+            params_dict = _jsonlib.loads(params.get('params', '{}'))
             params_dict.update(bind_params)
-            params['params'] = json.dumps(params_dict)
+            params['params'] = _jsonlib.dumps(params_dict).decode('utf-8')
 
         params['q'] = query
         params['db'] = database or self._database
@@ -526,7 +588,8 @@ class InfluxDBClient(object):
             if chunk_size > 0:
                 params['chunk_size'] = chunk_size
 
-        if query.lower().startswith("select ") and " into " in query.lower():
+        lowered = query.lower()
+        if lowered.startswith("select ") and " into " in lowered:
             method = "POST"
 
         response = self.request(
@@ -542,7 +605,7 @@ class InfluxDBClient(object):
         if not data:
             if chunked:
                 return self._read_chunked_response(response)
-            data = response.json()
+            data = _jsonlib.loads(response.content)
 
         results = [
             ResultSet(result, raise_errors=raise_errors)
@@ -564,7 +627,8 @@ class InfluxDBClient(object):
                      tags=None,
                      batch_size=None,
                      protocol='json',
-                     consistency=None
+                     consistency=None,
+                     max_workers=None
                      ):
         """Write to multiple time series names.
 
@@ -596,6 +660,11 @@ class InfluxDBClient(object):
         :param consistency: Consistency for the points.
             One of {'any','one','quorum','all'}.
         :type consistency: str
+        :param max_workers: number of batches to write concurrently when
+            `batch_size` is set. Batches share the client's connection pool,
+            so this should not exceed `pool_size`. Defaults to None, which
+            writes one batch at a time
+        :type max_workers: int
         :returns: True, if the operation is successful
         :rtype: bool
 
@@ -603,13 +672,21 @@ class InfluxDBClient(object):
             policy for the database is used
         """
         if batch_size and batch_size > 0:
-            for batch in self._batches(points, batch_size):
-                self._write_points(points=batch,
-                                   time_precision=time_precision,
-                                   database=database,
-                                   retention_policy=retention_policy,
-                                   tags=tags, protocol=protocol,
-                                   consistency=consistency)
+            write = partial(self._write_points,
+                            time_precision=time_precision,
+                            database=database,
+                            retention_policy=retention_policy,
+                            tags=tags, protocol=protocol,
+                            consistency=consistency)
+            batches = self._batches(points, batch_size)
+            if max_workers and max_workers > 1:
+                # Materialize each batch as it is taken, since all of
+                # them slice the same iterator
+                write_concurrently(write, (list(b) for b in batches),
+                                   max_workers)
+            else:
+                for batch in batches:
+                    write(batch)
             return True
 
         return self._write_points(points=points,
@@ -654,12 +731,12 @@ class InfluxDBClient(object):
                       tags,
                       protocol='json',
                       consistency=None):
-        if time_precision not in ['n', 'u', 'ms', 's', 'm', 'h', None]:
+        if time_precision not in _TIME_PRECISIONS:
             raise ValueError(
                 "Invalid time precision is given. "
                 "(use 'n', 'u', 'ms', 's', 'm' or 'h')")
 
-        if consistency not in ['any', 'one', 'quorum', 'all', None]:
+        if consistency not in _CONSISTENCY_LEVELS:
             raise ValueError('Invalid consistency: {}'.format(consistency))
 
         if protocol == 'json':
@@ -733,11 +810,10 @@ class InfluxDBClient(object):
         query_str = 'SHOW SERIES'
 
         if measurement:
-            query_str += ' FROM "{0}"'.format(measurement)
+            query_str += ' FROM {0}'.format(quote_ident(measurement))
 
         if tags:
-            query_str += ' WHERE ' + ' and '.join(["{0}='{1}'".format(k, v)
-                                                   for k, v in tags.items()])
+            query_str += ' WHERE ' + _tag_filter(tags)
 
         return list(
             itertools.chain.from_iterable(
@@ -755,8 +831,7 @@ class InfluxDBClient(object):
         :param dbname: the name of the database to create
         :type dbname: str
         """
-        self.query("CREATE DATABASE {0}".format(quote_ident(dbname)),
-                   method="POST")
+        self.query(_CREATE_DATABASE.format(quote_ident(dbname)), method="POST")
 
     def drop_database(self, dbname):
         """Drop a database from InfluxDB.
@@ -764,8 +839,7 @@ class InfluxDBClient(object):
         :param dbname: the name of the database to drop
         :type dbname: str
         """
-        self.query("DROP DATABASE {0}".format(quote_ident(dbname)),
-                   method="POST")
+        self.query(_DROP_DATABASE.format(quote_ident(dbname)), method="POST")
 
     def get_list_measurements(self):
         """Get the list of measurements in InfluxDB.
@@ -791,7 +865,7 @@ class InfluxDBClient(object):
         :param measurement: the name of the measurement to drop
         :type measurement: str
         """
-        self.query("DROP MEASUREMENT {0}".format(quote_ident(measurement)),
+        self.query(_DROP_MEASUREMENT.format(quote_ident(measurement)),
                    method="POST")
 
     def create_retention_policy(self, name, duration, replication,
@@ -825,11 +899,9 @@ class InfluxDBClient(object):
             The minimum shard group duration is 1 hour.
         :type shard_duration: str
         """
-        query_string = \
-            "CREATE RETENTION POLICY {0} ON {1} " \
-            "DURATION {2} REPLICATION {3} SHARD DURATION {4}".format(
-                quote_ident(name), quote_ident(database or self._database),
-                duration, replication, shard_duration)
+        query_string = _CREATE_RETENTION_POLICY.format(
+            quote_ident(name), quote_ident(database or self._database),
+            duration, replication, shard_duration)
 
         if default is True:
             query_string += " DEFAULT"
@@ -870,10 +942,8 @@ class InfluxDBClient(object):
         .. note:: at least one of duration, replication, or default flag
             should be set. Otherwise the operation will fail.
         """
-        query_string = (
-            "ALTER RETENTION POLICY {0} ON {1}"
-        ).format(quote_ident(name),
-                 quote_ident(database or self._database))
+        query_string = _ALTER_RETENTION_POLICY.format(
+            quote_ident(name), quote_ident(database or self._database))
         if duration:
             query_string += " DURATION {0}".format(duration)
         if shard_duration:
@@ -894,9 +964,8 @@ class InfluxDBClient(object):
             dropped. Defaults to current client's database
         :type database: str
         """
-        query_string = (
-            "DROP RETENTION POLICY {0} ON {1}"
-        ).format(quote_ident(name), quote_ident(database or self._database))
+        query_string = _DROP_RETENTION_POLICY.format(
+            quote_ident(name), quote_ident(database or self._database))
         self.query(query_string, method="POST")
 
     def get_list_retention_policies(self, database=None):
@@ -925,7 +994,7 @@ class InfluxDBClient(object):
                 "parameter or the client to be using a database")
 
         rsp = self.query(
-            "SHOW RETENTION POLICIES ON {0}".format(
+            _SHOW_RETENTION_POLICIES.format(
                 quote_ident(database or self._database))
         )
         return list(rsp.get_points())
@@ -959,7 +1028,7 @@ class InfluxDBClient(object):
             privileges or not
         :type admin: boolean
         """
-        text = "CREATE USER {0} WITH PASSWORD {1}".format(
+        text = _CREATE_USER.format(
             quote_ident(username), quote_literal(password))
         if admin:
             text += ' WITH ALL PRIVILEGES'
@@ -971,7 +1040,7 @@ class InfluxDBClient(object):
         :param username: the username to drop
         :type username: str
         """
-        text = "DROP USER {0}".format(quote_ident(username))
+        text = _DROP_USER.format(quote_ident(username))
         self.query(text, method="POST")
 
     def set_user_password(self, username, password):
@@ -982,7 +1051,7 @@ class InfluxDBClient(object):
         :param password: the new password for the user
         :type password: str
         """
-        text = "SET PASSWORD FOR {0} = {1}".format(
+        text = _SET_PASSWORD.format(
             quote_ident(username), quote_literal(password))
         self.query(text)
 
@@ -1007,9 +1076,7 @@ class InfluxDBClient(object):
             query_str += ' FROM {0}'.format(quote_ident(measurement))
 
         if tags:
-            tag_eq_list = ["{0}={1}".format(quote_ident(k), quote_literal(v))
-                           for k, v in tags.items()]
-            query_str += ' WHERE ' + ' AND '.join(tag_eq_list)
+            query_str += ' WHERE ' + _tag_filter(tags)
         self.query(query_str, database=database, method="POST")
 
     def grant_admin_privileges(self, username):
@@ -1021,7 +1088,7 @@ class InfluxDBClient(object):
         .. note:: Only a cluster administrator can create/drop databases
             and manage users.
         """
-        text = "GRANT ALL PRIVILEGES TO {0}".format(quote_ident(username))
+        text = _GRANT_ADMIN.format(quote_ident(username))
         self.query(text, method="POST")
 
     def revoke_admin_privileges(self, username):
@@ -1033,7 +1100,7 @@ class InfluxDBClient(object):
         .. note:: Only a cluster administrator can create/ drop databases
             and manage users.
         """
-        text = "REVOKE ALL PRIVILEGES FROM {0}".format(quote_ident(username))
+        text = _REVOKE_ADMIN.format(quote_ident(username))
         self.query(text, method="POST")
 
     def grant_privilege(self, privilege, database, username):
@@ -1047,9 +1114,9 @@ class InfluxDBClient(object):
         :param username: the username to grant the privilege to
         :type username: str
         """
-        text = "GRANT {0} ON {1} TO {2}".format(privilege,
-                                                quote_ident(database),
-                                                quote_ident(username))
+        text = _GRANT_PRIVILEGE.format(privilege,
+                                       quote_ident(database),
+                                       quote_ident(username))
         self.query(text, method="POST")
 
     def revoke_privilege(self, privilege, database, username):
@@ -1063,9 +1130,9 @@ class InfluxDBClient(object):
         :param username: the username to revoke the privilege from
         :type username: str
         """
-        text = "REVOKE {0} ON {1} FROM {2}".format(privilege,
-                                                   quote_ident(database),
-                                                   quote_ident(username))
+        text = _REVOKE_PRIVILEGE.format(privilege,
+                                        quote_ident(database),
+                                        quote_ident(username))
         self.query(text, method="POST")
 
     def get_list_privileges(self, username):
@@ -1087,7 +1154,7 @@ class InfluxDBClient(object):
              {u'privilege': u'ALL PRIVILEGES', u'database': u'db2'},
              {u'privilege': u'NO PRIVILEGES', u'database': u'db3'}]
         """
-        text = "SHOW GRANTS FOR {0}".format(quote_ident(username))
+        text = _SHOW_GRANTS.format(quote_ident(username))
         return list(self.query(text).get_points())
 
     def get_list_continuous_queries(self):
@@ -1162,10 +1229,9 @@ class InfluxDBClient(object):
                 }
             ]
         """
-        query_string = (
-            "CREATE CONTINUOUS QUERY {0} ON {1}{2} BEGIN {3} END"
-        ).format(quote_ident(name), quote_ident(database or self._database),
-                 ' RESAMPLE ' + resample_opts if resample_opts else '', select)
+        query_string = _CREATE_CONTINUOUS_QUERY.format(
+            quote_ident(name), quote_ident(database or self._database),
+            ' RESAMPLE ' + resample_opts if resample_opts else '', select)
         self.query(query_string)
 
     def drop_continuous_query(self, name, database=None):
@@ -1177,14 +1243,16 @@ class InfluxDBClient(object):
             dropped. Defaults to current client's database
         :type database: str
         """
-        query_string = (
-            "DROP CONTINUOUS QUERY {0} ON {1}"
-        ).format(quote_ident(name), quote_ident(database or self._database))
+        query_string = _DROP_CONTINUOUS_QUERY.format(
+            quote_ident(name), quote_ident(database or self._database))
         self.query(query_string)
 
     def send_packet(self, packet, protocol='json', time_precision=None):
         """Send an UDP packet.
 
+        Lines are packed into as few datagrams as possible, each small
+        enough to avoid IP fragmentation.
+
         :param packet: the packet to be sent
         :type packet: (if protocol is 'json') dict
                       (if protocol is 'line') list of line protocol strings
@@ -1194,10 +1262,24 @@ class InfluxDBClient(object):
         :type time_precision: str
         """
         if protocol == 'json':
-            data = make_lines(packet, time_precision).encode('utf-8')
+            lines = make_lines(packet, time_precision).split('\n')[:-1]
         elif protocol == 'line':
-            data = ('\n'.join(packet) + '\n').encode('utf-8')
-        self.udp_socket.sendto(data, (self._host, self._udp_port))
+            lines = packet
+        for data in _udp_datagrams(lines):
+            self._send_udp(data)
+
+    def _send_udp(self, data):
+        if not self._udp_connected:
+            # A connected socket lets the kernel cache the route instead of
+            # looking up the destination on every sendto()
+            self.udp_socket.connect(self._udp_address)
+            self._udp_connected = True
+        try:
+            self.udp_socket.send(data)
+        except ConnectionRefusedError:
+            # Connected UDP sockets report an ICMP error caused by an earlier
+            # datagram on the next send; keep UDP writes fire-and-forget.
+            self.udp_socket.send(data)
 
     def close(self):
         """Close http session."""
@@ -10,8 +10,6 @@ from collections import namedtuple, defaultdict
 from datetime import datetime
 from warnings import warn
 
-import six
-
 
 class SeriesHelper(object):
     """Subclass this helper eases writing data points in bulk.
@@ -176,7 +174,7 @@ class SeriesHelper(object):
         json = []
         if not cls.__initialized__:
             cls._reset_()
-        for series_name, data in six.iteritems(cls._datapoints):
+        for series_name, data in cls._datapoints.items():
             for point in data:
                 json_point = {
                     "measurement": series_name,
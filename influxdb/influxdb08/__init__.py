@@ -7,6 +7,7 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 from .client import InfluxDBClient
+from .buffered_client import BufferedInfluxDBClient
 from .dataframe_client import DataFrameClient
 from .helper import SeriesHelper
 
@@ -15,4 +16,5 @@ __all__ = [
     'InfluxDBClient',
     'DataFrameClient',
     'SeriesHelper',
+    'BufferedInfluxDBClient',
 ]
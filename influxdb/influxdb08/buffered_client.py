@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""Buffered writer for the InfluxDB v0.8 client."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+
+from influxdb import _jsonlib
+from .client import _TIME_PRECISIONS
+
+
+class BufferedInfluxDBClient(object):
+    """Collect points from many small writes and send them together.
+
+    :meth:`write_points` only encodes the points and adds them to a buffer.
+    A background thread posts the buffer as a single request once it holds
+    ``max_bytes`` of encoded points, or ``max_interval`` seconds after the
+    previous flush, whichever comes first. Points of the same series are
+    merged into one entry of the request.
+
+    Errors from a background flush are raised by the next call to
+    :meth:`write_points`, :meth:`flush` or :meth:`close`; the points of
+    the failed request are dropped. :meth:`flush` and :meth:`close` still
+    send the points buffered since then before raising the error.
+
+    The buffer must be closed with :meth:`close`, or used as a context
+    manager, so the last points are sent.
+
+    :param client: the client used to send the points
+    :type client: :class:`~influxdb.influxdb08.InfluxDBClient`
+    :param max_bytes: size of encoded points which triggers a flush,
+        defaults to 1 MiB
+    :type max_bytes: int
+    :param max_interval: maximum number of seconds between two flushes,
+        defaults to 1
+    :type max_interval: float
+    :param time_precision: precision of the points' times, either 's', 'm',
+        'ms' or 'u', defaults to 's'
+    :type time_precision: str
+    """
+
+    def __init__(self, client, max_bytes=1 << 20, max_interval=1.0,
+                 time_precision='s'):
+        """Start the background flush thread."""
+        if time_precision not in _TIME_PRECISIONS:
+            raise ValueError(
+                "Invalid time precision is given. (use 's', 'm', 'ms' or 'u')")
+
+        self._client = client
+        self._max_bytes = max_bytes
+        self._max_interval = max_interval
+        self._time_precision = time_precision
+
+        # Encoded points per (name, columns), and their total size
+        self._buf = {}
+        self._bytes = 0
+        self._error = None
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._thread = threading.Thread(target=self._flusher, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        """Enter function as used by context manager."""
+        return self
+
+    def __exit__(self, _exc_type, _exc_value, _traceback):
+        """Exit function as used by context manager."""
+        self.close()
+
+    def write_points(self, data):
+        """Add points to the buffer.
+
+        :param data: A list of dicts in InfluxDB 0.8.x data format.
+        :type data: list
+        :returns: True
+        :rtype: bool
+        """
+        dumps = _jsonlib.dumps
+        encoded = []
+        size = 0
+        # Encode outside the lock so writers don't wait on each other
+        for item in data:
+            points = item.get('points', ())
+            if not hasattr(points, '__len__'):
+                points = list(points)
+            if not len(points):
+                continue
+            # Drop the brackets so points of several writes can be joined
+            chunk = dumps(points)[1:-1]
+            key = (item.get('name'), tuple(item.get('columns') or ()))
+            encoded.append((key, chunk))
+            size += len(chunk)
+
+        with self._cond:
+            self._raise_error()
+            if self._closed:
+                raise ValueError("write to a closed BufferedInfluxDBClient")
+            for key, chunk in encoded:
+                self._buf.setdefault(key, []).append(chunk)
+            self._bytes += size
+            if self._bytes >= self._max_bytes:
+                self._cond.notify()
+        return True
+
+    def flush(self):
+        """Send the buffered points now."""
+        try:
+            self._send(self._take())
+        finally:
+            with self._cond:
+                self._raise_error()
+
+    def close(self):
+        """Stop the background thread and send the remaining points."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+
+    def _raise_error(self):
+        # Called with the lock held
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _take(self):
+        with self._cond:
+            buf = self._buf
+            self._buf = {}
+            self._bytes = 0
+        return buf
+
+    def _send(self, buf):
+        if not buf:
+            return
+        dumps = _jsonlib.dumps
+        body = b'[' + b','.join(
+            dumps({"name": name, "columns": list(columns)})[:-1]
+            + b',"points":[' + b','.join(chunks) + b']}'
+            for (name, columns), chunks in buf.items()
+        ) + b']'
+        self._client._write_points(data=body,
+                                   time_precision=self._time_precision)
+
+    def _flusher(self):
+        while True:
+            with self._cond:
+                if not self._closed and self._bytes < self._max_bytes:
+                    self._cond.wait(self._max_interval)
+                if self._closed:
+                    # close() sends what is left from the caller's thread
+                    return
+            try:
+                self._send(self._take())
+            except Exception as e:
+                with self._cond:
+                    self._error = e
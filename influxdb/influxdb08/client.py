@@ -1,18 +1,66 @@
 # -*- coding: utf-8 -*-
 """Python client for InfluxDB v0.8."""
 
+import base64
+import gzip
 import warnings
+import zlib
 
-import json
 import socket
+import threading
+from collections import OrderedDict
+from functools import partial
+from itertools import islice
+from operator import itemgetter
+from time import monotonic
+from urllib.parse import quote, urlparse
+
 import requests
 import requests.exceptions
-from six.moves import xrange
-from six.moves.urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 
+from influxdb import _jsonlib
+from influxdb._concurrency import write_concurrently
 from influxdb import chunked_json
 
+_TIME_PRECISIONS = frozenset(('s', 'm', 'ms', 'u'))
+
+# Size of the body reads used to decode chunked query responses, and of
+# the chunks used to upload streamed write bodies
+_CHUNK_SIZE = 64 * 1024
+
+# Writes with more points than this are JSON-encoded while they are being
+# sent instead of being serialized to a single body up front
+_STREAM_MIN_POINTS = 10000
+
+# With gzip enabled, bodies smaller than this are sent uncompressed since
+# compressing them costs more than the bytes it saves. Level 1 compresses
+# JSON points several times over while keeping up with the network.
+_GZIP_MIN_SIZE = 1024
+_GZIP_LEVEL = 1
+
+# Number of keep-alive connections kept per host by the shared session. The
+# requests default of 10 makes concurrent batch writers reconnect.
+_POOL_SIZE = 32
+
 session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=_POOL_SIZE, pool_maxsize=_POOL_SIZE)
+session.mount('http://', _adapter)
+session.mount('https://', _adapter)
+
+
+def _is_read_only(query):
+    """Tell whether a query only reads data, and so can be cached."""
+    lowered = query.lstrip().lower()
+    if lowered.startswith('list '):
+        return True
+    # "select ... into" creates a continuous query
+    return lowered.startswith('select ') and ' into ' not in lowered
+
+
+def _basic_auth_header(username, password):
+    credentials = '{0}:{1}'.format(username, password).encode('utf-8')
+    return 'Basic ' + base64.b64encode(credentials).decode('ascii')
 
 
 class InfluxDBClientError(Exception):
@@ -26,6 +74,65 @@ class InfluxDBClientError(Exception):
         self.code = code
 
 
+class InfluxDBServerError(InfluxDBClientError):
+    """Raised when the server answers with a 5xx status code.
+
+    It derives from :class:`InfluxDBClientError`, so existing handlers
+    still catch it, while retry logic can single out server errors.
+    """
+
+
+class _SeriesJSONBody(object):
+    """Write body that JSON-encodes a list of series while it is sent.
+
+    requests uploads iterables with chunked transfer encoding. Iterating
+    again starts a new encoding pass, so the body can be retried.
+    """
+
+    def __init__(self, data):
+        self._data = data
+
+    def __iter__(self):
+        dumps = _jsonlib.dumps
+        buf = bytearray(b'[')
+        for index, series in enumerate(self._data):
+            if index:
+                buf += b','
+            if 'points' not in series:
+                buf += dumps(series)
+                continue
+
+            head = {k: v for k, v in series.items() if k != 'points'}
+            buf += dumps(head)[:-1]
+            buf += b',"points":[' if head else b'"points":['
+            for point_index, point in enumerate(series['points']):
+                if point_index:
+                    buf += b','
+                buf += dumps(point)
+                if len(buf) >= _CHUNK_SIZE:
+                    yield bytes(buf)
+                    del buf[:]
+            buf += b']}'
+        buf += b']'
+        yield bytes(buf)
+
+
+class _GzipBody(object):
+    """Write body that gzips a re-iterable body while it is sent."""
+
+    def __init__(self, body):
+        self._body = body
+
+    def __iter__(self):
+        compressor = zlib.compressobj(_GZIP_LEVEL, zlib.DEFLATED,
+                                      16 + zlib.MAX_WBITS)
+        for chunk in self._body:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+
 class InfluxDBClient(object):
     """Define the standard InfluxDBClient for influxdb v0.8.
 
@@ -58,6 +165,23 @@ class InfluxDBClient(object):
     :type use_udp: int
     :param udp_port: UDP port to connect to InfluxDB, defaults is 4444
     :type udp_port: int
+    :param gzip: use gzip content encoding to compress request bodies,
+        defaults is False
+    :type gzip: bool
+    :param session: requests Session to send requests with, e.g. one with
+        its own connection pool size, defaults to the session shared by all
+        clients
+    :type session: requests.Session
+    :param query_cache_size: number of results of ``select`` and ``list``
+        queries to keep and return again for identical queries, defaults to
+        0 (no caching). Cached results are shared between callers and must
+        not be modified
+    :type query_cache_size: int
+    :param query_cache_ttl: number of seconds a cached query result is
+        used for, defaults to 1. Writes, deletions and any other query
+        made through the client empty the cache; changes made by other
+        clients show up once the cached result expires
+    :type query_cache_ttl: float
     """
 
     def __init__(self,
@@ -71,13 +195,18 @@ class InfluxDBClient(object):
                  timeout=None,
                  retries=3,
                  use_udp=False,
-                 udp_port=4444):
+                 udp_port=4444,
+                 gzip=False,
+                 session=None,
+                 query_cache_size=0,
+                 query_cache_ttl=1.0):
         """Construct a new InfluxDBClient object."""
         self._host = host
         self._port = port
-        self._username = username
-        self._password = password
+        self._set_credentials(username, password)
         self._database = database
+        self._db_url = "db/" + quote(str(database), safe='')
+        self._series_url = self._db_url + "/series"
         self._timeout = timeout
         self._retries = retries
 
@@ -87,6 +216,8 @@ class InfluxDBClient(object):
         self._udp_port = udp_port
         if use_udp:
             self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._udp_address = (host, udp_port)
+        self._udp_connected = False
 
         self._scheme = "http"
 
@@ -97,10 +228,27 @@ class InfluxDBClient(object):
             self._scheme,
             self._host,
             self._port)
+        self._url_prefix = self._baseurl + '/'
 
         self._headers = {
             'Content-type': 'application/json',
-            'Accept': 'text/plain'}
+            'Accept': 'application/json'}
+
+        self._gzip = gzip
+        # Look the module session up at call time by default, so patching
+        # influxdb08.client.session keeps working
+        self._session = session
+        self._gzip_headers = dict(self._headers)
+        self._gzip_headers['Content-Encoding'] = 'gzip'
+
+        # (expiry, result) per query, least recently used first
+        self._query_cache = OrderedDict() if query_cache_size > 0 else None
+        self._query_cache_size = query_cache_size
+        self._query_cache_ttl = query_cache_ttl
+        self._query_cache_lock = threading.Lock()
+        # Bumped on every invalidation, so that a query which was in flight
+        # during a write does not store its now stale result
+        self._query_cache_generation = 0
 
     @staticmethod
     def from_dsn(dsn, **kwargs):
@@ -168,6 +316,14 @@ class InfluxDBClient(object):
 
         return InfluxDBClient(**init_args)
 
+    def __enter__(self):
+        """Enter function as used by context manager."""
+        return self
+
+    def __exit__(self, _exc_type, _exc_value, _traceback):
+        """Exit function as used by context manager."""
+        self.close()
+
     # Change member variables
 
     def switch_database(self, database):
@@ -177,6 +333,8 @@ class InfluxDBClient(object):
         :type database: string
         """
         self._database = database
+        self._db_url = "db/" + quote(str(database), safe='')
+        self._series_url = self._db_url + "/series"
 
     def switch_db(self, database):
         """Change client database.
@@ -198,38 +356,53 @@ class InfluxDBClient(object):
         :param password: the new password to switch to
         :type password: string
         """
+        self._set_credentials(username, password)
+
+    def _set_credentials(self, username, password):
+        # Every change of credentials goes through here so that the cached
+        # header never goes stale
         self._username = username
         self._password = password
+        self._auth_header = _basic_auth_header(username, password)
+
+    def _auth(self, request):
+        # requests auth hook: reuse the header built by _set_credentials
+        # instead of encoding the credentials again for every request
+        request.headers['Authorization'] = self._auth_header
+        return request
 
     def request(self, url, method='GET', params=None, data=None,
-                expected_response_code=200):
+                expected_response_code=200, stream=False):
         """Make a http request to API."""
-        url = "{0}/{1}".format(self._baseurl, url)
-
-        if params is None:
-            params = {}
-
-        auth = {
-            'u': self._username,
-            'p': self._password
-        }
-
-        params.update(auth)
-
-        if data is not None and not isinstance(data, str):
-            data = json.dumps(data)
+        url = self._url_prefix + url
+
+        if isinstance(data, (dict, list, tuple)):
+            data = _jsonlib.dumps(data)
+
+        headers = self._headers
+        if self._gzip and data is not None:
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            if not isinstance(data, bytes):
+                data = _GzipBody(data)
+                headers = self._gzip_headers
+            elif len(data) >= _GZIP_MIN_SIZE:
+                data = gzip.compress(data, compresslevel=_GZIP_LEVEL)
+                headers = self._gzip_headers
 
         retry = True
         _try = 0
         # Try to send the request more than once by default (see #103)
         while retry:
             try:
-                response = session.request(
+                response = (self._session or session).request(
                     method=method,
                     url=url,
                     params=params,
+                    auth=self._auth,
                     data=data,
-                    headers=self._headers,
+                    stream=stream,
+                    headers=headers,
                     verify=self._verify_ssl,
                     timeout=self._timeout
                 )
@@ -242,8 +415,15 @@ class InfluxDBClient(object):
         else:
             raise requests.exceptions.ConnectionError
 
+        if method != 'GET':
+            # Invalidate once the change is done, so that no query started
+            # before it completed can cache the old data
+            self.invalidate_query_cache()
+
         if response.status_code == expected_response_code:
             return response
+        elif 500 <= response.status_code < 600:
+            raise InfluxDBServerError(response.content, response.status_code)
         else:
             raise InfluxDBClientError(response.content, response.status_code)
 
@@ -283,41 +463,88 @@ class InfluxDBClient(object):
             }
         ]
 
-        :param data: A list of dicts in InfluxDB 0.8.x data format.
+        :param data: A list of dicts in InfluxDB 0.8.x data format, or
+            such a list already encoded by :meth:`serialize_points`, which
+            is sent as is.
         :param time_precision: [Optional, default 's'] Either 's', 'm', 'ms'
             or 'u'.
         :param batch_size: [Optional] Value to write the points in batches
             instead of all at one time. Useful for when doing data dumps from
-            one database to another or when doing a massive write operation
+            one database to another or when doing a massive write operation.
+            Points of several series are sent together until a batch is full.
+            Ignored for encoded data.
         :type batch_size: int
+        :param max_workers: [Optional] Number of batches written concurrently
+            when ``batch_size`` is set. Defaults to writing them one at a
+            time.
+        :type max_workers: int
 
         """
-        def list_chunks(data_list, n):
-            """Yield successive n-sized chunks from l."""
-            for i in xrange(0, len(data_list), n):
-                yield data_list[i:i + n]
+        def batches():
+            dumps = _jsonlib.dumps
+            series = []
+            size = 0
+            for item in data:
+                points = item.get('points', ())
+                # Sequences are sliced, which keeps NumPy arrays as views
+                # that orjson encodes in one call; other iterables, such as
+                # generators, are consumed lazily
+                sliceable = hasattr(points, '__getitem__')
+                if not sliceable:
+                    points = iter(points)
+
+                # Serialize name and columns once per series and splice
+                # each slice of points into the encoded body
+                head = dumps({"name": item.get('name'),
+                              "columns": item.get('columns')})
+                head = head[:-1] + b',"points":'
+                start = 0
+                while True:
+                    end = start + batch_size - size
+                    if sliceable:
+                        batch = points[start:end]
+                    else:
+                        batch = list(islice(points, end - start))
+                    if not len(batch):
+                        break
+                    start = end
+                    series.append(head + dumps(batch) + b'}')
+                    size += len(batch)
+                    if size == batch_size:
+                        yield b'[' + b','.join(series) + b']'
+                        series = []
+                        size = 0
+            if series:
+                yield b'[' + b','.join(series) + b']'
 
         batch_size = kwargs.get('batch_size')
-        if batch_size and batch_size > 0:
-            for item in data:
-                name = item.get('name')
-                columns = item.get('columns')
-                point_list = item.get('points', [])
-
-                for batch in list_chunks(point_list, batch_size):
-                    item = [{
-                        "points": batch,
-                        "name": name,
-                        "columns": columns
-                    }]
-                    self._write_points(
-                        data=item,
-                        time_precision=time_precision)
+        encoded = isinstance(data, (bytes, str))
+        if batch_size and batch_size > 0 and not encoded:
+            write = partial(self._write_points, time_precision=time_precision)
+            max_workers = kwargs.get('max_workers')
+            if max_workers and max_workers > 1:
+                write_concurrently(write, batches(), max_workers)
+            else:
+                for batch in batches():
+                    write(batch)
             return True
 
         return self._write_points(data=data,
                                   time_precision=time_precision)
 
+    @staticmethod
+    def serialize_points(data):
+        """Encode points for :meth:`write_points`.
+
+        The encoded body can be written several times, e.g. again after a
+        failed write or to several clients, without encoding it each time.
+
+        :param data: A list of dicts in InfluxDB 0.8.x data format.
+        :returns: the JSON-encoded points
+        :rtype: bytes
+        """
+        return _jsonlib.dumps(data)
+
     def write_points_with_precision(self, data, time_precision='s'):
         """Write to multiple time series names.
 
@@ -331,24 +558,27 @@ class InfluxDBClient(object):
         return self._write_points(data=data, time_precision=time_precision)
 
     def _write_points(self, data, time_precision):
-        if time_precision not in ['s', 'm', 'ms', 'u']:
-            raise Exception(
+        if time_precision not in _TIME_PRECISIONS:
+            raise ValueError(
                 "Invalid time precision is given. (use 's', 'm', 'ms' or 'u')")
 
         if self._use_udp and time_precision != 's':
-            raise Exception(
+            raise ValueError(
                 "InfluxDB only supports seconds precision for udp writes"
             )
 
-        url = "db/{0}/series".format(self._database)
+        url = self._series_url
 
-        params = {
-            'time_precision': time_precision
-        }
+        params = 'time_precision=' + time_precision
 
         if self._use_udp:
             self.send_packet(data)
         else:
+            if isinstance(data, list) and sum(
+                    len(series.get('points', ())) for series in data
+            ) > _STREAM_MIN_POINTS:
+                data = _SeriesJSONBody(data)
+
             self.request(
                 url=url,
                 method='POST',
@@ -363,7 +593,7 @@ class InfluxDBClient(object):
 
     def delete_points(self, name):
         """Delete an entire series."""
-        url = "db/{0}/series/{1}".format(self._database, name)
+        url = self._series_url + "/" + quote(name, safe='')
 
         self.request(
             url=url,
@@ -419,47 +649,92 @@ class InfluxDBClient(object):
         :param chunked: [Optional, default=False] True if the data shall be
             retrieved in chunks, False otherwise.
         """
-        return self._query(query, time_precision=time_precision,
-                           chunked=chunked)
+        if self._query_cache is None or not _is_read_only(query):
+            return self._query(query, time_precision=time_precision,
+                               chunked=chunked)
+
+        # The URL and credentials are part of the key so that
+        # switch_database() and switch_user() never see other results
+        key = (self._series_url, self._auth_header, query, time_precision,
+               chunked)
+        cache = self._query_cache
+        with self._query_cache_lock:
+            entry = cache.get(key)
+            if entry is not None and entry[0] > monotonic():
+                cache.move_to_end(key)
+                return entry[1]
+            generation = self._query_cache_generation
+
+        result = self._query(query, time_precision=time_precision,
+                             chunked=chunked)
+
+        with self._query_cache_lock:
+            if generation != self._query_cache_generation:
+                return result
+            cache[key] = (monotonic() + self._query_cache_ttl, result)
+            cache.move_to_end(key)
+            while len(cache) > self._query_cache_size:
+                cache.popitem(last=False)
+        return result
+
+    def invalidate_query_cache(self):
+        """Forget all cached query results."""
+        if self._query_cache is not None:
+            with self._query_cache_lock:
+                self._query_cache.clear()
+                self._query_cache_generation += 1
+
+    def query_stream(self, query, time_precision='s'):
+        """Query data from the influxdb v0.8 database one series at a time.
+
+        The response is retrieved in chunks and every series is yielded as
+        soon as it has been received, so large results are never held in
+        memory all at once.
+
+        :param time_precision: [Optional, default 's'] Either 's', 'm', 'ms'
+            or 'u'.
+        :rtype: generator of dicts
+        """
+        response = self._query_response(query, time_precision, chunked=True)
+        return chunked_json.iterloads(response.iter_content(_CHUNK_SIZE))
 
     # Querying Data
     #
     # GET db/:name/series. It takes five parameters
     def _query(self, query, time_precision='s', chunked=False):
-        if time_precision not in ['s', 'm', 'ms', 'u']:
-            raise Exception(
-                "Invalid time precision is given. (use 's', 'm', 'ms' or 'u')")
+        response = self._query_response(query, time_precision, chunked)
 
-        if chunked is True:
-            chunked_param = 'true'
-        else:
-            chunked_param = 'false'
+        if chunked:
+            return list(chunked_json.iterloads(
+                response.iter_content(_CHUNK_SIZE)))
+
+        return _jsonlib.loads(response.content)
+
+    def _query_response(self, query, time_precision, chunked):
+        if time_precision not in _TIME_PRECISIONS:
+            raise ValueError(
+                "Invalid time precision is given. (use 's', 'm', 'ms' or 'u')")
 
         # Build the URL of the series to query
-        url = "db/{0}/series".format(self._database)
+        url = self._series_url
 
-        params = {
-            'q': query,
-            'time_precision': time_precision,
-            'chunked': chunked_param
-        }
+        # Encode the query string directly: urlencode() would first split
+        # a params dict back into key/value pairs
+        params = ('q=' + quote(query, safe='') +
+                  '&time_precision=' + time_precision +
+                  '&chunked=' + ('true' if chunked is True else 'false'))
 
         response = self.request(
             url=url,
             method='GET',
             params=params,
-            expected_response_code=200
+            expected_response_code=200,
+            stream=chunked
         )
-
-        if chunked:
-            try:
-                decoded = chunked_json.loads(response.content.decode())
-            except UnicodeDecodeError:
-                decoded = chunked_json.loads(response.content.decode('utf-8'))
-
-            return list(decoded)
-
-        return response.json()
+        # 0.8 also deletes series and manages continuous queries over GET
+        if not _is_read_only(query):
+            self.invalidate_query_cache()
+        return response
 
     # Creating and Dropping Databases
     #
@@ -496,7 +771,7 @@ class InfluxDBClient(object):
         :type database: string
         :rtype: boolean
         """
-        url = "db/{0}".format(database)
+        url = "db/" + quote(database, safe='')
 
         self.request(
             url=url,
@@ -519,7 +794,7 @@ class InfluxDBClient(object):
             expected_response_code=200
         )
 
-        return response.json()
+        return _jsonlib.loads(response.content)
 
     def get_database_list(self):
         """Get the list of databases.
@@ -540,10 +815,7 @@ class InfluxDBClient(object):
         :type series: string
         :rtype: boolean
         """
-        url = "db/{0}/series/{1}".format(
-            self._database,
-            series
-        )
+        url = self._series_url + "/" + quote(series, safe='')
 
         self.request(
             url=url,
@@ -556,12 +828,12 @@ class InfluxDBClient(object):
     def get_list_series(self):
         """Get a list of all time series in a database."""
         response = self._query('list series')
-        return [series[1] for series in response[0]['points']]
+        return list(map(itemgetter(1), response[0]['points']))
 
     def get_list_continuous_queries(self):
         """Get a list of continuous queries."""
         response = self._query('list continuous queries')
-        return [query[2] for query in response[0]['points']]
+        return list(map(itemgetter(2), response[0]['points']))
 
     # Security
     # get list of cluster admins
@@ -602,7 +874,7 @@ class InfluxDBClient(object):
             expected_response_code=200
         )
 
-        return response.json()
+        return _jsonlib.loads(response.content)
 
     def add_cluster_admin(self, new_username, new_password):
         """Add cluster admin."""
@@ -622,7 +894,7 @@ class InfluxDBClient(object):
 
     def update_cluster_admin_password(self, username, new_password):
         """Update cluster admin password."""
-        url = "cluster_admins/{0}".format(username)
+        url = "cluster_admins/" + quote(username, safe='')
 
         data = {
             'password': new_password
@@ -639,7 +911,7 @@ class InfluxDBClient(object):
 
     def delete_cluster_admin(self, username):
         """Delete cluster admin."""
-        url = "cluster_admins/{0}".format(username)
+        url = "cluster_admins/" + quote(username, safe='')
 
         self.request(
             url=url,
@@ -659,7 +931,7 @@ class InfluxDBClient(object):
 
     def alter_database_admin(self, username, is_admin):
         """Alter the database admin."""
-        url = "db/{0}/users/{1}".format(self._database, username)
+        url = self._db_url + "/users/" + quote(username, safe='')
 
         data = {'admin': is_admin}
 
@@ -732,7 +1004,7 @@ class InfluxDBClient(object):
 
     def get_database_users(self):
         """Get list of database users."""
-        url = "db/{0}/users".format(self._database)
+        url = self._db_url + "/users"
 
         response = self.request(
             url=url,
@@ -740,14 +1012,14 @@ class InfluxDBClient(object):
             expected_response_code=200
         )
 
-        return response.json()
+        return _jsonlib.loads(response.content)
 
     def add_database_user(self, new_username, new_password, permissions=None):
         """Add database user.
 
         :param permissions: A ``(readFrom, writeTo)`` tuple
         """
-        url = "db/{0}/users".format(self._database)
+        url = self._db_url + "/users"
 
         data = {
             'name': new_username,
@@ -782,7 +1054,7 @@ class InfluxDBClient(object):
         :raise TypeError: if permissions cannot be read.
         :raise ValueError: if neither password nor permissions provided.
         """
-        url = "db/{0}/users/{1}".format(self._database, username)
+        url = self._db_url + "/users/" + quote(username, safe='')
 
         if not password and not permissions:
             raise ValueError("Nothing to alter for user {0}.".format(username))
@@ -807,14 +1079,14 @@ class InfluxDBClient(object):
             expected_response_code=200
         )
 
-        if username == self._username:
-            self._password = password
+        if username == self._username and password:
+            self._set_credentials(username, password)
 
         return True
 
     def delete_database_user(self, username):
         """Delete database user."""
-        url = "db/{0}/users/{1}".format(self._database, username)
+        url = self._db_url + "/users/" + quote(username, safe='')
 
         self.request(
             url=url,
@@ -838,6 +1110,29 @@ class InfluxDBClient(object):
 
     def send_packet(self, packet):
         """Send a UDP packet along the wire."""
-        data = json.dumps(packet)
-        byte = data.encode('utf-8')
-        self.udp_socket.sendto(byte, (self._host, self._udp_port))
+        if not self._udp_connected:
+            # A connected socket lets the kernel cache the route instead of
+            # looking up the destination on every sendto()
+            self.udp_socket.connect(self._udp_address)
+            self._udp_connected = True
+        if isinstance(packet, bytes):
+            data = packet
+        else:
+            data = _jsonlib.dumps(packet)
+        try:
+            self.udp_socket.send(data)
+        except ConnectionRefusedError:
+            # Connected UDP sockets report an ICMP error caused by an earlier
+            # datagram on the next send; keep UDP writes fire-and-forget.
+            self.udp_socket.send(data)
+        self.invalidate_query_cache()
+
+    def close(self):
+        """Close the pooled http connections of the ``session`` passed in.
+
+        The session shared by all clients is left open, since other clients
+        keep using its connections. The session stays usable and simply
+        reconnects on the next request.
+        """
+        if self._session is not None:
+            self._session.close()
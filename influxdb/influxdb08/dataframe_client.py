@@ -25,7 +25,8 @@ class DataFrameClient(InfluxDBClient):
         super(DataFrameClient, self).__init__(*args, **kwargs)
 
         try:
-            global pd
+            global np, pd
+            import numpy as np
             import pandas as pd
         except ImportError as ex:
             raise ImportError('DataFrameClient requires Pandas, '
@@ -138,35 +139,27 @@ class DataFrameClient(InfluxDBClient):
                             PeriodIndex.')
 
         if isinstance(dataframe.index, pd.PeriodIndex):
-            dataframe.index = dataframe.index.to_timestamp()
+            index = dataframe.index.to_timestamp()
         else:
-            dataframe.index = pd.to_datetime(dataframe.index)
+            index = pd.to_datetime(dataframe.index)
+
+        if index.tzinfo is None:
+            index = index.tz_localize('UTC')
 
-        if dataframe.index.tzinfo is None:
-            dataframe.index = dataframe.index.tz_localize('UTC')
-        dataframe['time'] = [self._datetime_to_epoch(dt, time_precision)
-                             for dt in dataframe.index]
+        # Convert whole columns at once rather than row by row; assign()
+        # also leaves the caller's dataframe untouched
+        dataframe = dataframe.assign(
+            time=np.asarray(self._datetime_to_epoch(index, time_precision)))
+        values = dataframe.values
+        if self.ignore_nan:
+            nans = pd.isna(values)
+            if nans.any():
+                values = np.where(nans, None, values)
         data = {'name': name,
                 'columns': [str(column) for column in dataframe.columns],
-                'points': [self._convert_array(x) for x in dataframe.values]}
+                'points': values.tolist()}
         return data
 
-    def _convert_array(self, array):
-        try:
-            global np
-            import numpy as np
-        except ImportError as ex:
-            raise ImportError('DataFrameClient requires Numpy, '
-                              '"{ex}" problem importing'.format(ex=str(ex)))
-
-        if self.ignore_nan:
-            number_types = (int, float, np.number)
-            condition = (all(isinstance(el, number_types) for el in array) and
-                         np.isnan(array))
-            return list(np.where(condition, None, array))
-
-        return list(array)
-
     def _datetime_to_epoch(self, datetime, time_precision='s'):
         seconds = (datetime - self.EPOCH).total_seconds()
         if time_precision == 's':
@@ -7,11 +7,11 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 from datetime import datetime
+from functools import lru_cache
 from numbers import Integral
 
 from pytz import UTC
 from dateutil.parser import parse
-from six import binary_type, text_type, integer_types, PY2
 
 EPOCH = UTC.localize(datetime.utcfromtimestamp(0))
 
@@ -28,7 +28,7 @@ def _convert_timestamp(timestamp, precision=None):
     if isinstance(timestamp, Integral):
         return timestamp  # assume precision is correct if timestamp is int
 
-    if isinstance(_get_unicode(timestamp), text_type):
+    if isinstance(_get_unicode(timestamp), str):
         timestamp = parse(timestamp)
 
     if isinstance(timestamp, datetime):
@@ -58,7 +58,13 @@ def _convert_timestamp(timestamp, precision=None):
 
 
 def _escape_tag(tag):
-    tag = _get_unicode(tag, force=True)
+    return _escape_text(_get_unicode(tag, force=True))
+
+
+# Measurements, tag keys/values and field keys repeat across points, so
+# remember recently escaped strings instead of rescanning them every time
+@lru_cache(maxsize=4096)
+def _escape_text(tag):
     return tag.replace(
         "\\", "\\\\"
     ).replace(
@@ -108,10 +114,10 @@ def _escape_value(value):
         return ''
 
     value = _get_unicode(value)
-    if isinstance(value, text_type):
+    if isinstance(value, str):
         return quote_ident(value)
 
-    if isinstance(value, integer_types) and not isinstance(value, bool):
+    if isinstance(value, int) and not isinstance(value, bool):
         return str(value) + 'i'
 
     if isinstance(value, bool):
@@ -125,15 +131,13 @@ def _escape_value(value):
 
 def _get_unicode(data, force=False):
     """Try to return a text aka unicode object from the given data."""
-    if isinstance(data, binary_type):
+    if isinstance(data, bytes):
         return data.decode('utf-8')
 
     if data is None:
         return ''
 
     if force:
-        if PY2:
-            return unicode(data)
         return str(data)
 
     return data
@@ -148,37 +152,29 @@ def make_line(measurement, tags=None, fields=None, time=None, precision=None):
 
     # tags should be sorted client-side to take load off server
     tag_list = []
-    for tag_key in sorted(tags.keys()):
+    for tag_key in sorted(tags):
         key = _escape_tag(tag_key)
         value = _escape_tag(tags[tag_key])
 
         if key != '' and value != '':
-            tag_list.append(
-                "{key}={value}".format(key=key, value=value)
-            )
+            tag_list.append(key + '=' + value)
 
     if tag_list:
         line += ',' + ','.join(tag_list)
 
     field_list = []
-    for field_key in sorted(fields.keys()):
+    for field_key in sorted(fields):
         key = _escape_tag(field_key)
         value = _escape_value(fields[field_key])
 
         if key != '' and value != '':
-            field_list.append("{key}={value}".format(
-                key=key,
-                value=value
-            ))
+            field_list.append(key + '=' + value)
 
     if field_list:
         line += ' ' + ','.join(field_list)
 
     if time is not None:
-        timestamp = _get_unicode(str(int(
-            _convert_timestamp(time, precision)
-        )))
-        line += ' ' + timestamp
+        line += ' ' + str(int(_convert_timestamp(time, precision)))
 
     return line
 
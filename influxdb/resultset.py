@@ -89,10 +89,17 @@ class ResultSet(object):
         :return: Points generator
         """
         # Raise error if measurement is not str or bytes
-        if not isinstance(measurement,
-                          (bytes, type(b''.decode()), type(None))):
+        if not isinstance(measurement, (bytes, str, type(None))):
             raise TypeError('measurement must be an str or None')
 
+        if measurement is None and tags is None:
+            # Unfiltered: every point of every series matches, which is
+            # what the client's SHOW ... helpers ask for.
+            for series in self._get_series():
+                for item in self._get_points_for_series(series):
+                    yield item
+            return
+
         for series in self._get_series():
             series_name = series.get('measurement',
                                      series.get('name', 'results'))
@@ -108,18 +115,19 @@ class ResultSet(object):
                 # by default if no tags was provided then
                 # we will matches every returned series
                 series_tags = series.get('tags', {})
-                for item in self._get_points_for_series(series):
-                    if tags is None or \
-                            self._tag_matches(item, tags) or \
-                            self._tag_matches(series_tags, tags):
+                if tags is None or self._tag_matches(series_tags, tags):
+                    # the series tags match, so every point does
+                    for item in self._get_points_for_series(series):
                         yield item
+                else:
+                    for item in self._get_points_for_series(series):
+                        if self._tag_matches(item, tags):
+                            yield item
 
     def __repr__(self):
         """Representation of ResultSet object."""
-        items = []
-
-        for item in self.items():
-            items.append("'%s': %s" % (item[0], list(item[1])))
+        items = ["'%s': %s" % (key, list(points))
+                 for key, points in self.items()]
 
         return "ResultSet({%s})" % ", ".join(items)
 
@@ -155,29 +163,22 @@ class ResultSet(object):
 
         :return: List of keys. Keys are tuples (series_name, tags)
         """
-        keys = []
-        for series in self._get_series():
-            keys.append(
-                (series.get('measurement',
-                            series.get('name', 'results')),
-                 series.get('tags', None))
-            )
-        return keys
+        return [self._series_key(series) for series in self._get_series()]
 
     def items(self):
         """Return the set of items from the ResultSet.
 
         :return: List of tuples, (key, generator)
         """
-        items = []
-        for series in self._get_series():
-            series_key = (series.get('measurement',
-                                     series.get('name', 'results')),
-                          series.get('tags', None))
-            items.append(
-                (series_key, self._get_points_for_series(series))
-            )
-        return items
+        return [(self._series_key(series),
+                 self._get_points_for_series(series))
+                for series in self._get_series()]
+
+    @staticmethod
+    def _series_key(series):
+        """Return the (series_name, tags) key of a series."""
+        return (series.get('measurement', series.get('name', 'results')),
+                series.get('tags', None))
 
     def _get_points_for_series(self, series):
         """Return generator of dict from columns and values of a series.
@@ -185,11 +186,13 @@ class ResultSet(object):
         :param series: One series
         :return: Generator of dicts
         """
-        for point in series.get('values', []):
-            yield self.point_from_cols_vals(
-                series['columns'],
-                point
-            )
+        values = series.get('values')
+        if not values:
+            return
+
+        columns = series['columns']
+        for point in values:
+            yield dict(zip(columns, point))
 
     @staticmethod
     def point_from_cols_vals(cols, vals):
@@ -199,8 +202,4 @@ class ResultSet(object):
         :param vals: List of values
         :return: Dict where keys are columns.
         """
-        point = {}
-        for col_index, col_name in enumerate(cols):
-            point[col_name] = vals[col_index]
-
-        return point
+        return dict(zip(cols, vals))
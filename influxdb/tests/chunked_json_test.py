@@ -6,6 +6,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import json
 import unittest
 
 from influxdb import chunked_json
@@ -49,3 +50,22 @@ class TestChunkJson(unittest.TestCase):
             ],
             res
         )
+
+    def test_iterloads(self):
+        """Test reading JSON values from arbitrarily split byte chunks."""
+        objects = [{'name': 'foo', 'points': [[1, 'unicode-\u03c9']]},
+                   {'name': 'bar', 'points': []}]
+        payload = ''.join(
+            json.dumps(obj, ensure_ascii=False) + '\n' for obj in objects
+        ).encode('utf-8')
+
+        for size in (1, 2, 7, len(payload)):
+            chunks = [payload[i:i + size]
+                      for i in range(0, len(payload), size)]
+            self.assertListEqual(
+                list(chunked_json.iterloads(chunks)), objects)
+
+    def test_iterloads_truncated(self):
+        """Test an incomplete trailing JSON value raises ValueError."""
+        with self.assertRaises(ValueError):
+            list(chunked_json.iterloads([b'{"a": 1}{"b": ']))
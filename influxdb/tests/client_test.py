@@ -24,7 +24,6 @@ import socket
 import unittest
 import warnings
 
-import io
 import gzip
 import json
 import mock
@@ -36,6 +35,7 @@ from nose.tools import raises
 from urllib3.connection import HTTPConnection
 
 from influxdb import InfluxDBClient
+from influxdb.exceptions import InfluxDBClientError
 from influxdb.resultset import ResultSet
 
 
@@ -198,6 +198,25 @@ class TestInfluxDBClient(unittest.TestCase):
                 b"value=0.64 1257894000000000000\n",
             )
 
+    def test_write_headers(self):
+        """Test write sends line protocol headers plus custom headers."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.POST,
+                "http://localhost:8086/write",
+                status_code=204
+            )
+            cli = InfluxDBClient(database='db', headers={'X-Custom': 'yes'})
+            cli.write_points(
+                [{"measurement": "cpu_load_short",
+                  "fields": {"value": 0.64}}]
+            )
+
+            self.assertEqual(m.last_request.headers['Content-Type'],
+                             'application/octet-stream')
+            self.assertEqual(m.last_request.headers['X-Custom'], 'yes')
+            self.assertEqual(cli._headers['Content-Type'], 'application/json')
+
     def test_write_points(self):
         """Test write points for TestInfluxDBClient object."""
         with requests_mock.Mocker() as m:
@@ -237,20 +256,10 @@ class TestInfluxDBClient(unittest.TestCase):
                              "fields": {"value": 0.64}}]}
             )
 
-            compressed = io.BytesIO()
-            with gzip.GzipFile(
-                compresslevel=9,
-                fileobj=compressed,
-                mode='w'
-            ) as f:
-                f.write(
-                    b"cpu_load_short,host=server01,region=us-west "
-                    b"value=0.64 1257894000000000000\n"
-                )
-
             self.assertEqual(
-                m.last_request.body,
-                compressed.getvalue(),
+                gzip.decompress(m.last_request.body),
+                b"cpu_load_short,host=server01,region=us-west "
+                b"value=0.64 1257894000000000000\n"
             )
 
     def test_write_points_gzip(self):
@@ -267,21 +276,53 @@ class TestInfluxDBClient(unittest.TestCase):
                 self.dummy_points,
             )
 
-            compressed = io.BytesIO()
-            with gzip.GzipFile(
-                compresslevel=9,
-                fileobj=compressed,
-                mode='w'
-            ) as f:
-                f.write(
-                    b'cpu_load_short,host=server01,region=us-west '
-                    b'value=0.64 1257894000123456000\n'
-                )
             self.assertEqual(
-                m.last_request.body,
-                compressed.getvalue(),
+                gzip.decompress(m.last_request.body),
+                b'cpu_load_short,host=server01,region=us-west '
+                b'value=0.64 1257894000123456000\n'
+            )
+            self.assertEqual(m.last_request.headers['Content-Encoding'],
+                             'gzip')
+            self.assertEqual(m.last_request.headers['Accept-Encoding'],
+                             'gzip')
+
+    def test_request_gzip_custom_headers(self):
+        """Test gzip does not modify headers passed to request()."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.POST,
+                "http://localhost:8086/write",
+                status_code=204
+            )
+
+            cli = InfluxDBClient(database='db', gzip=True)
+            headers = {'Content-Type': 'text/plain'}
+            cli.request('write', method='POST', data=b'cpu value=1',
+                        expected_response_code=204, headers=headers)
+
+            self.assertEqual(headers, {'Content-Type': 'text/plain'})
+            self.assertEqual(m.last_request.headers['Content-Encoding'],
+                             'gzip')
+            self.assertEqual(gzip.decompress(m.last_request.body),
+                             b'cpu value=1')
+
+    def test_query_gzip_headers(self):
+        """Test query advertises gzip when the client uses gzip."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.GET,
+                "http://localhost:8086/query",
+                text='{"results": [{}]}'
             )
 
+            cli = InfluxDBClient(database='db', gzip=True)
+            cli.query('select * from cpu')
+
+            self.assertEqual(m.last_request.headers['Accept-Encoding'],
+                             'gzip')
+            self.assertEqual(m.last_request.headers['Content-Type'],
+                             'application/json')
+
     def test_write_points_toplevel_attributes(self):
         """Test write points attrs for TestInfluxDBClient object."""
         with requests_mock.Mocker() as m:
@@ -363,6 +404,45 @@ class TestInfluxDBClient(unittest.TestCase):
         self.assertEqual(expected_last_body,
                          m.last_request.body.decode('utf-8'))
 
+    def test_write_points_batch_concurrent(self):
+        """Test write points in batches written by several workers."""
+        dummy_points = (
+            {"measurement": "cpu", "fields": {"value": i},
+             "time": 1257894000 + i}
+            for i in range(7)
+        )
+
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST,
+                           "http://localhost:8086/write",
+                           status_code=204)
+            cli = InfluxDBClient(database='db')
+            cli.write_points(points=dummy_points,
+                             time_precision='s',
+                             batch_size=2,
+                             max_workers=3)
+
+            self.assertEqual(m.call_count, 4)
+            bodies = sorted(r.body.decode('utf-8') for r in m.request_history)
+            self.assertEqual(
+                ''.join(bodies),
+                ''.join('cpu value={0}i {1}\n'.format(i, 1257894000 + i)
+                        for i in range(7))
+            )
+
+    def test_write_points_batch_concurrent_fails(self):
+        """Test a failed concurrent batch write raises the error."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST,
+                           "http://localhost:8086/write",
+                           status_code=400)
+            cli = InfluxDBClient(database='db')
+            with self.assertRaises(InfluxDBClientError):
+                cli.write_points(['cpu value=1', 'cpu value=2'],
+                                 protocol='line',
+                                 batch_size=1,
+                                 max_workers=2)
+
     def test_write_points_udp(self):
         """Test write points UDP for TestInfluxDBClient object."""
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -383,6 +463,63 @@ class TestInfluxDBClient(unittest.TestCase):
             received_data.decode()
         )
 
+    def test_write_points_udp_line(self):
+        """Test write line protocol points over UDP."""
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        port = random.randint(4000, 8000)
+        s.bind(('0.0.0.0', port))
+
+        cli = InfluxDBClient(
+            'localhost', 8086, 'root', 'root',
+            'test', use_udp=True, udp_port=port
+        )
+        cli.write_points(['cpu value=1 1', 'cpu value=2 2'], protocol='line')
+
+        received_data, addr = s.recvfrom(1024)
+
+        self.assertEqual('cpu value=1 1\ncpu value=2 2\n',
+                         received_data.decode())
+
+    def test_write_points_udp_split(self):
+        """Test large UDP writes are split into unfragmented datagrams."""
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.bind(('localhost', 0))
+        port = s.getsockname()[1]
+
+        cli = InfluxDBClient(
+            'localhost', 8086, 'root', 'root',
+            'test', use_udp=True, udp_port=port
+        )
+        lines = ['cpu,host=server{0:03d} value={0} {0}'.format(i)
+                 for i in range(200)]
+        cli.write_points(lines, protocol='line')
+
+        received = []
+        s.settimeout(1)
+        while sum(d.count(b'\n') for d in received) < len(lines):
+            received.append(s.recv(4096))
+        s.close()
+
+        self.assertGreater(len(received), 1)
+        for datagram in received:
+            self.assertLessEqual(len(datagram), 1400)
+            self.assertTrue(datagram.endswith(b'\n'))
+        self.assertEqual(b''.join(received).decode().splitlines(), lines)
+
+    def test_write_points_udp_unreachable(self):
+        """Test UDP writes to a closed port do not raise."""
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.bind(('localhost', 0))
+        port = s.getsockname()[1]
+        s.close()
+
+        cli = InfluxDBClient(
+            'localhost', 8086, 'root', 'root',
+            'test', use_udp=True, udp_port=port
+        )
+        for _ in range(3):
+            cli.write_points(['cpu value=1'], protocol='line')
+
     @raises(Exception)
     def test_write_points_fails(self):
         """Test write points fail for TestInfluxDBClient object."""
@@ -651,6 +788,25 @@ class TestInfluxDBClient(unittest.TestCase):
                 [example_object, example_object]
             )
 
+    def test_query_does_not_modify_params(self):
+        """Test query leaves the caller's params dict untouched."""
+        example_response = '{"results": [{}]}'
+
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.GET,
+                "http://localhost:8086/query",
+                text=example_response
+            )
+            params = {'epoch': 's'}
+            self.cli.query('select * from foo', params=params,
+                           bind_params={'x': 1}, database='db')
+
+            self.assertEqual(params, {'epoch': 's'})
+            self.assertEqual(m.last_request.qs['epoch'], ['s'])
+            self.assertEqual(m.last_request.qs['db'], ['db'])
+            self.assertEqual(m.last_request.qs['params'], ['{"x":1}'])
+
     @raises(Exception)
     def test_query_fail(self):
         """Test query failed for TestInfluxDBClient object."""
@@ -840,6 +996,25 @@ class TestInfluxDBClient(unittest.TestCase):
                 self.cli.get_list_series(tags={'region': 'us-west'}),
                 ['cpu_load_short,host=server01,region=us-west'])
 
+    def test_get_list_series_quotes_identifiers(self):
+        """Test get a list of series escapes measurement and tags."""
+        example_response = '{"results": [{}]}'
+
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.GET,
+                "http://localhost:8086/query",
+                text=example_response
+            )
+            self.cli.get_list_series(measurement='cpu"load',
+                                     tags={'region': "us'west"})
+
+            self.assertEqual(
+                m.last_request.qs['q'][0],
+                'show series from "cpu\\"load" '
+                'where "region"=\'us\\\'west\''
+            )
+
     @raises(Exception)
     def test_get_list_series_fails(self):
         """Test get a list of series from the database but fail."""
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the BufferedInfluxDBClient of InfluxDB v0.8."""
+
+import json
+import threading
+import unittest
+
+import requests_mock
+
+from influxdb.influxdb08 import BufferedInfluxDBClient, InfluxDBClient
+from influxdb.influxdb08.client import InfluxDBClientError
+
+_URL = "http://localhost:8086/db/db/series"
+
+
+class TestBufferedInfluxDBClient(unittest.TestCase):
+    """Set up the TestBufferedInfluxDBClient object."""
+
+    def setUp(self):
+        """Set up a client for the tests."""
+        self.cli = InfluxDBClient(database='db')
+
+    def test_close_merges_series(self):
+        """Test points of one series are sent together on close."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST, _URL)
+            with BufferedInfluxDBClient(self.cli, max_interval=60) as buf:
+                buf.write_points([{"name": "a", "columns": ["v"],
+                                   "points": [[1]]}])
+                buf.write_points([{"name": "b", "columns": ["v"],
+                                   "points": [[2]]},
+                                  {"name": "a", "columns": ["v"],
+                                   "points": ([3], [4])}])
+                self.assertFalse(m.called)
+
+            self.assertEqual(m.call_count, 1)
+            self.assertEqual(m.last_request.qs['time_precision'], ['s'])
+            self.assertEqual(
+                json.loads(m.last_request.body),
+                [{"name": "a", "columns": ["v"], "points": [[1], [3], [4]]},
+                 {"name": "b", "columns": ["v"], "points": [[2]]}])
+
+    def test_flush_on_size(self):
+        """Test the background thread flushes once max_bytes is reached."""
+        sent = threading.Event()
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST, _URL,
+                           text=lambda request, context: sent.set() or '')
+            buf = BufferedInfluxDBClient(self.cli, max_bytes=8,
+                                         max_interval=60)
+            buf.write_points([{"name": "a", "columns": ["v"],
+                               "points": [[1]]}])
+            self.assertFalse(m.called)
+            buf.write_points([{"name": "a", "columns": ["v"],
+                               "points": [[12345]]}])
+            self.assertTrue(sent.wait(5))
+            buf.close()
+
+            self.assertEqual(m.call_count, 1)
+            self.assertEqual(json.loads(m.last_request.body)[0]['points'],
+                             [[1], [12345]])
+
+    def test_flush_on_interval(self):
+        """Test the background thread flushes after max_interval."""
+        sent = threading.Event()
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST, _URL,
+                           text=lambda request, context: sent.set() or '')
+            buf = BufferedInfluxDBClient(self.cli, max_interval=0.01)
+            buf.write_points([{"name": "a", "columns": ["v"],
+                               "points": [[1]]}])
+            self.assertTrue(sent.wait(5))
+            buf.close()
+
+            self.assertEqual(m.call_count, 1)
+
+    def test_flush(self):
+        """Test flush sends the buffer right away and skips empty ones."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST, _URL)
+            buf = BufferedInfluxDBClient(self.cli, max_interval=60,
+                                         time_precision='ms')
+            buf.flush()
+            self.assertFalse(m.called)
+            buf.write_points([{"name": "a", "columns": ["v"],
+                               "points": iter([[1]])}])
+            buf.flush()
+            self.assertEqual(m.call_count, 1)
+            self.assertEqual(m.last_request.qs['time_precision'], ['ms'])
+            buf.close()
+            self.assertEqual(m.call_count, 1)
+
+    def test_background_error_is_raised(self):
+        """Test a failed background flush is raised by the next call."""
+        sent = threading.Event()
+
+        def fail(request, context):
+            context.status_code = 500
+            sent.set()
+            return 'fail'
+
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST, _URL, text=fail)
+            buf = BufferedInfluxDBClient(self.cli, max_bytes=1,
+                                         max_interval=60)
+            buf.write_points([{"name": "a", "columns": ["v"],
+                               "points": [[1]]}])
+            self.assertTrue(sent.wait(5))
+            with self.assertRaises(InfluxDBClientError):
+                buf.close()
+
+    def test_close_sends_after_background_error(self):
+        """Test close sends points written during a failed flush."""
+        sent = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def fail_once(request, context):
+            if not sent.is_set():
+                sent.set()
+                release.wait(5)
+                context.status_code = 500
+            return ''
+
+        def close():
+            try:
+                buf.close()
+            except InfluxDBClientError as e:
+                errors.append(e)
+
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST, _URL, text=fail_once)
+            buf = BufferedInfluxDBClient(self.cli, max_bytes=10,
+                                         max_interval=60)
+            buf.write_points([{"name": "a", "columns": ["v"],
+                               "points": [[1234567890]]}])
+            self.assertTrue(sent.wait(5))
+            buf.write_points([{"name": "a", "columns": ["v"],
+                               "points": [[99]]}])
+
+            closer = threading.Thread(target=close)
+            closer.start()
+            while not buf._closed:
+                closer.join(0.001)
+            release.set()
+            closer.join(5)
+
+            self.assertEqual(len(errors), 1)
+            self.assertEqual(m.call_count, 2)
+            self.assertEqual(json.loads(m.last_request.body)[0]['points'],
+                             [[99]])
+            self.assertEqual(buf._buf, {})
+
+    def test_write_after_close(self):
+        """Test writing to a closed buffer raises."""
+        buf = BufferedInfluxDBClient(self.cli)
+        buf.close()
+        with self.assertRaises(ValueError):
+            buf.write_points([{"name": "a", "columns": ["v"],
+                               "points": [[1]]}])
+
+    def test_invalid_time_precision(self):
+        """Test an unknown precision is rejected."""
+        with self.assertRaises(ValueError):
+            BufferedInfluxDBClient(self.cli, time_precision='g')
@@ -1,23 +1,33 @@
 # -*- coding: utf-8 -*-
 """Client unit tests."""
 
+import gzip
 import json
 import socket
+import time
 import sys
 import unittest
 import random
 import warnings
+from urllib.parse import parse_qs, urlparse
 
 import mock
 import requests
 import requests.exceptions
 import requests_mock
 
+try:
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore
+
 from nose.tools import raises
 from mock import patch
 
+from influxdb import _jsonlib
 from influxdb.influxdb08 import InfluxDBClient
-from influxdb.influxdb08.client import session
+from influxdb.influxdb08.client import InfluxDBClientError, session
+from influxdb.influxdb08.client import InfluxDBServerError
 
 if sys.version < '3':
     import codecs
@@ -52,13 +62,15 @@ def _mocked_session(method="GET", status_code=200, content=""):
             data = kwargs.get('data', None)
 
             if data is not None:
-                # Data must be a string
-                assert isinstance(data, str)
+                # Data must be an encoded or plain string
+                assert isinstance(data, (bytes, str))
 
                 # Data must be a JSON string
                 assert c == json.loads(data, strict=True)
 
                 c = data
+                if isinstance(c, bytes):
+                    c = c.decode('utf-8')
 
         # Anyway, Content must be a JSON string (or empty string)
         if not isinstance(c, str):
@@ -130,6 +142,21 @@ class TestInfluxDBClient(unittest.TestCase):
         cli = InfluxDBClient('host', 8086, 'username', 'password', 'database')
         cli.switch_database('another_database')
         self.assertEqual(cli._database, 'another_database')
+        self.assertEqual(cli._series_url, 'db/another_database/series')
+
+    def test_url_quoting(self):
+        """Test database and series names are escaped in request paths."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.DELETE,
+                "http://localhost:8086/db/my%20db%2F1/series/cpu%3Fload",
+                status_code=204
+            )
+
+            cli = InfluxDBClient(database='my db/1')
+            self.assertTrue(cli.delete_series('cpu?load'))
+            self.assertEqual(m.last_request.path,
+                             '/db/my%20db%2f1/series/cpu%3fload')
 
     @raises(FutureWarning)
     def test_switch_db_deprecated(self):
@@ -191,6 +218,77 @@ class TestInfluxDBClient(unittest.TestCase):
                 json.loads(m.last_request.body),
                 self.dummy_points
             )
+            self.assertNotIn(b', ', m.last_request.body)
+            self.assertNotIn(b': ', m.last_request.body)
+            self.assertEqual(m.last_request.qs, {'time_precision': ['s']})
+
+    def test_write_points_streamed(self):
+        """Test large writes are sent as a chunked JSON body."""
+        with requests_mock.Mocker() as m, \
+                patch('influxdb.influxdb08.client._STREAM_MIN_POINTS', 1), \
+                patch('influxdb.influxdb08.client._CHUNK_SIZE', 16):
+            m.register_uri(
+                requests_mock.POST,
+                "http://localhost:8086/db/db/series"
+            )
+
+            cli = InfluxDBClient(database='db')
+            cli.write_points(self.dummy_points)
+
+            body = m.last_request.body
+            self.assertEqual(
+                m.last_request.headers['Transfer-Encoding'], 'chunked')
+            # The body can be replayed, e.g. when the request is retried
+            self.assertEqual(b''.join(body), b''.join(body))
+            self.assertListEqual(
+                json.loads(b''.join(body)),
+                self.dummy_points
+            )
+
+    def test_write_points_gzip(self):
+        """Test large writes are gzipped when gzip is enabled."""
+        points = [{
+            "name": "foo",
+            "columns": ["column_one", "column_two"],
+            "points": [["value", i] for i in range(200)]
+        }]
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.POST,
+                "http://localhost:8086/db/db/series"
+            )
+
+            cli = InfluxDBClient(database='db', gzip=True)
+            cli.write_points(points)
+
+            self.assertEqual(
+                m.last_request.headers['Content-Encoding'], 'gzip')
+            self.assertListEqual(
+                json.loads(gzip.decompress(m.last_request.body)), points)
+
+            cli.write_points(self.dummy_points)
+
+            self.assertNotIn('Content-Encoding', m.last_request.headers)
+            self.assertListEqual(
+                json.loads(m.last_request.body), self.dummy_points)
+
+    def test_write_points_streamed_gzip(self):
+        """Test streamed writes are gzipped while they are sent."""
+        with requests_mock.Mocker() as m, \
+                patch('influxdb.influxdb08.client._STREAM_MIN_POINTS', 1):
+            m.register_uri(
+                requests_mock.POST,
+                "http://localhost:8086/db/db/series"
+            )
+
+            cli = InfluxDBClient(database='db', gzip=True)
+            cli.write_points(self.dummy_points)
+
+            body = b''.join(m.last_request.body)
+            self.assertEqual(
+                m.last_request.headers['Content-Encoding'], 'gzip')
+            self.assertListEqual(
+                json.loads(gzip.decompress(body)), self.dummy_points)
 
     def test_write_points_string(self):
         """Test write string points for TestInfluxDBClient object."""
@@ -210,6 +308,24 @@ class TestInfluxDBClient(unittest.TestCase):
                 self.dummy_points
             )
 
+    def test_write_points_serialized(self):
+        """Test serialized points are sent as is, even with batch_size."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.POST,
+                "http://localhost:8086/db/db/series"
+            )
+
+            cli = InfluxDBClient(database='db')
+            body = InfluxDBClient.serialize_points(self.dummy_points)
+            self.assertIsInstance(body, bytes)
+            cli.write_points(body, batch_size=1)
+            cli.write_points(body)
+
+            self.assertEqual(m.call_count, 2)
+            self.assertEqual(m.last_request.body, body)
+            self.assertListEqual(json.loads(body), self.dummy_points)
+
     def test_write_points_batch(self):
         """Test write batch points for TestInfluxDBClient object."""
         with requests_mock.Mocker() as m:
@@ -220,6 +336,39 @@ class TestInfluxDBClient(unittest.TestCase):
             cli.write_points(data=self.dummy_points, batch_size=2)
         self.assertEqual(1, m.call_count)
 
+    def test_write_points_batch_generator(self):
+        """Test write batch points from a generator of points."""
+        points = [{"name": "foo",
+                   "columns": ["val"],
+                   "points": ([i] for i in range(5))}]
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST,
+                           "http://localhost:8086/db/db/series")
+            cli = InfluxDBClient('localhost', 8086,
+                                 'username', 'password', 'db')
+            cli.write_points(data=points, batch_size=2)
+        self.assertEqual(m.call_count, 3)
+        self.assertEqual([[0], [1]], m.request_history[0].json()[0]['points'])
+        self.assertEqual([[4]], m.request_history[2].json()[0]['points'])
+
+    @unittest.skipUnless(numpy is not None and _jsonlib.orjson is not None,
+                         "requires numpy and orjson")
+    def test_write_points_batch_numpy(self):
+        """Test write batch points from a NumPy array."""
+        points = [{"name": "foo",
+                   "columns": ["time", "val"],
+                   "points": numpy.arange(10).reshape(5, 2)}]
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST,
+                           "http://localhost:8086/db/db/series")
+            cli = InfluxDBClient('localhost', 8086,
+                                 'username', 'password', 'db')
+            cli.write_points(data=points, batch_size=2)
+        self.assertEqual(m.call_count, 3)
+        self.assertEqual([[0, 1], [2, 3]],
+                         m.request_history[0].json()[0]['points'])
+        self.assertEqual([[8, 9]], m.request_history[2].json()[0]['points'])
+
     def test_write_points_batch_invalid_size(self):
         """Test write batch points invalid size for TestInfluxDBClient."""
         with requests_mock.Mocker() as m:
@@ -243,7 +392,13 @@ class TestInfluxDBClient(unittest.TestCase):
              "name": "bar",
              "columns": ["val1", "val2", "val3"]},
         ]
-        expected_last_body = [{'points': [['7', 7, 7.0], ['8', 8, 8.0]],
+        expected_second_body = [{'points': [['4', 4, 4.0], ['5', 5, 5.0]],
+                                 'name': 'foo',
+                                 'columns': ['val1', 'val2', 'val3']},
+                                {'points': [['1', 1, 1.0]],
+                                 'name': 'bar',
+                                 'columns': ['val1', 'val2', 'val3']}]
+        expected_last_body = [{'points': [['8', 8, 8.0]],
                                'name': 'bar',
                                'columns': ['val1', 'val2', 'val3']}]
         with requests_mock.Mocker() as m:
@@ -253,8 +408,67 @@ class TestInfluxDBClient(unittest.TestCase):
                                  'username', 'password', 'db')
             cli.write_points(data=dummy_points, batch_size=3)
         self.assertEqual(m.call_count, 5)
+        self.assertEqual(expected_second_body, m.request_history[1].json())
         self.assertEqual(expected_last_body, m.request_history[4].json())
 
+    def test_write_points_batch_concurrent(self):
+        """Test write points batches with several workers."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST,
+                           "http://localhost:8086/db/db/series")
+            cli = InfluxDBClient('localhost', 8086,
+                                 'username', 'password', 'db')
+            cli.write_points(data=self.dummy_points, batch_size=1,
+                             max_workers=2)
+        self.assertEqual(m.call_count, 2)
+        self.assertEqual(
+            sorted(r.json()[0]['points'][0][0] for r in m.request_history),
+            ['1', '2'])
+
+    def test_write_points_batch_concurrent_lazy(self):
+        """Test concurrent batches take points from a generator lazily."""
+        taken = []
+
+        def points():
+            for i in range(20):
+                taken.append(i)
+                yield [i]
+
+        seen = []
+
+        def callback(request, context):
+            # Give the writer time to run ahead if it is not bounded
+            time.sleep(0.05)
+            seen.append(len(taken))
+            return ''
+
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST,
+                           "http://localhost:8086/db/db/series",
+                           text=callback)
+            cli = InfluxDBClient(database='db')
+            cli.write_points(
+                data=[{"name": "foo", "columns": ["val"],
+                       "points": points()}],
+                batch_size=1, max_workers=2)
+
+        self.assertEqual(m.call_count, 20)
+        # At most max_workers batches are in flight, plus the one taken
+        # while waiting for a free worker
+        self.assertLessEqual(seen[0], 3)
+
+    def test_write_points_batch_concurrent_fails(self):
+        """Test a failed concurrent batch write raises."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST,
+                           "http://localhost:8086/db/db/series",
+                           status_code=500)
+            cli = InfluxDBClient('localhost', 8086,
+                                 'username', 'password', 'db')
+            with self.assertRaises(InfluxDBClientError):
+                cli.write_points(data=self.dummy_points, batch_size=1,
+                                 max_workers=2)
+
     def test_write_points_udp(self):
         """Test write points UDP for TestInfluxDBClient object."""
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -272,6 +486,27 @@ class TestInfluxDBClient(unittest.TestCase):
         self.assertEqual(self.dummy_points,
                          json.loads(received_data.decode(), strict=True))
 
+    def test_write_points_batch_udp(self):
+        """Test write batch points over UDP."""
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.bind(('localhost', 0))
+        port = s.getsockname()[1]
+
+        cli = InfluxDBClient(
+            'localhost', 8086, 'root', 'root',
+            'test', use_udp=True, udp_port=port
+        )
+        cli.write_points(self.dummy_points, batch_size=1)
+
+        for point in self.dummy_points[0]['points']:
+            received_data, addr = s.recvfrom(1024)
+            self.assertEqual(
+                [{'name': 'foo',
+                  'columns': self.dummy_points[0]['columns'],
+                  'points': [point]}],
+                json.loads(received_data.decode(), strict=True))
+        s.close()
+
     def test_write_bad_precision_udp(self):
         """Test write UDP w/bad precision."""
         cli = InfluxDBClient(
@@ -280,7 +515,7 @@ class TestInfluxDBClient(unittest.TestCase):
         )
 
         with self.assertRaisesRegexp(
-                Exception,
+                ValueError,
                 "InfluxDB only supports seconds precision for udp writes"
         ):
             cli.write_points(
@@ -288,6 +523,26 @@ class TestInfluxDBClient(unittest.TestCase):
                 time_precision='ms'
             )
 
+    def test_request_error_types(self):
+        """Test 5xx responses raise InfluxDBServerError, others not."""
+        cli = InfluxDBClient(database='db')
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.GET, "http://localhost:8086/db",
+                           status_code=500, text='boom')
+            with self.assertRaises(InfluxDBServerError) as ctx:
+                cli.get_list_database()
+        self.assertIsInstance(ctx.exception, InfluxDBClientError)
+        self.assertEqual(ctx.exception.code, 500)
+        self.assertEqual(ctx.exception.content, b'boom')
+
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.GET, "http://localhost:8086/db",
+                           status_code=400, text='bad')
+            with self.assertRaises(InfluxDBClientError) as ctx:
+                cli.get_list_database()
+        self.assertNotIsInstance(ctx.exception, InfluxDBServerError)
+        self.assertEqual(ctx.exception.code, 400)
+
     @raises(Exception)
     def test_write_points_fails(self):
         """Test failed write points for TestInfluxDBClient object."""
@@ -305,7 +560,7 @@ class TestInfluxDBClient(unittest.TestCase):
         """Test write points with bad precision."""
         cli = InfluxDBClient()
         with self.assertRaisesRegexp(
-            Exception,
+            ValueError,
             "Invalid time precision is given. \(use 's', 'm', 'ms' or 'u'\)"
         ):
             cli.write_points(
@@ -329,8 +584,10 @@ class TestInfluxDBClient(unittest.TestCase):
             self.assertEqual(len(mocked.call_args_list), 1)
             args, kwds = mocked.call_args_list[0]
 
-            self.assertEqual(kwds['params'],
-                             {'u': 'username', 'p': 'password'})
+            self.assertIsNone(kwds['params'])
+            request = kwds['auth'](requests.Request('DELETE', 'http://host'))
+            self.assertEqual(request.headers['Authorization'],
+                             'Basic dXNlcm5hbWU6cGFzc3dvcmQ=')
             self.assertEqual(kwds['url'], 'http://host:8086/db/db/series/foo')
 
     @raises(Exception)
@@ -375,6 +632,116 @@ class TestInfluxDBClient(unittest.TestCase):
             result = cli.query('select column_one from foo;')
             self.assertEqual(len(result[0]['points']), 4)
 
+    def test_query_cache(self):
+        """Test identical queries are answered from the cache."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.GET,
+                           "http://localhost:8086/db/db/series", text='[]')
+            m.register_uri(requests_mock.GET,
+                           "http://localhost:8086/db/db2/series", text='[]')
+            m.register_uri(requests_mock.POST,
+                           "http://localhost:8086/db/db/series")
+            cli = InfluxDBClient(database='db', query_cache_size=2,
+                                 query_cache_ttl=60)
+
+            result = cli.query('select * from a')
+            self.assertIs(cli.query('select * from a'), result)
+            self.assertEqual(m.call_count, 1)
+
+            cli.query('select * from a', time_precision='ms')
+            cli.query('select * from b')
+            self.assertEqual(m.call_count, 3)
+            # The least recently used query was evicted
+            cli.query('select * from a')
+            self.assertEqual(m.call_count, 4)
+
+            cli.switch_database('db2')
+            cli.query('select * from a')
+            self.assertEqual(m.call_count, 5)
+            cli.switch_database('db')
+
+            cli.write_points(self.dummy_points)
+            cli.query('select * from a')
+            self.assertEqual(m.call_count, 7)
+
+    def test_query_cache_chunked(self):
+        """Test chunked and plain queries are cached separately."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.GET,
+                           "http://localhost:8086/db/db/series",
+                           text='[{"name": "a", "points": []}]')
+            cli = InfluxDBClient(database='db', query_cache_size=2,
+                                 query_cache_ttl=60)
+            cli.query('select * from a')
+            cli.query('select * from a', chunked=True)
+            self.assertEqual(m.call_count, 2)
+            self.assertEqual(m.last_request.qs['chunked'], ['true'])
+
+    def test_query_cache_skips_changes(self):
+        """Test queries which change data are neither cached nor stale."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.GET,
+                           "http://localhost:8086/db/db/series", text='[]')
+            cli = InfluxDBClient(database='db', query_cache_size=4,
+                                 query_cache_ttl=60)
+            cli.query('select * from a')
+            cli.query('select * from a into b')
+            cli.query('select * from a into b')
+            self.assertEqual(m.call_count, 3)
+            # The continuous query emptied the cache
+            cli.query('select * from a')
+            self.assertEqual(m.call_count, 4)
+
+            for query in ('delete from a', 'drop series a'):
+                cli.query(query)
+                cli.query(query)
+                cli.query('select * from a')
+            self.assertEqual(m.call_count, 10)
+
+    def test_query_cache_udp_write(self):
+        """Test UDP writes empty the query cache."""
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        port = random.randint(4000, 8000)
+        s.bind(('0.0.0.0', port))
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.GET,
+                           "http://localhost:8086/db/db/series", text='[]')
+            cli = InfluxDBClient(database='db', use_udp=True, udp_port=port,
+                                 query_cache_size=2, query_cache_ttl=60)
+            cli.query('select * from a')
+            cli.write_points(self.dummy_points)
+            cli.query('select * from a')
+            self.assertEqual(m.call_count, 2)
+        s.close()
+
+    def test_query_cache_ttl(self):
+        """Test expired cache entries are queried again."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.GET,
+                           "http://localhost:8086/db/db/series", text='[]')
+            cli = InfluxDBClient(database='db', query_cache_size=2,
+                                 query_cache_ttl=0)
+            cli.query('select * from a')
+            cli.query('select * from a')
+            self.assertEqual(m.call_count, 2)
+
+    def test_query_encoding(self):
+        """Test the query is escaped in the query string."""
+        query = "select * from \"a&b\" where v = '1+1=2' -- #x"
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.GET,
+                "http://localhost:8086/db/db/series",
+                text='[]'
+            )
+            cli = InfluxDBClient(database='db')
+            cli.query(query, time_precision='ms')
+
+            self.assertDictEqual(
+                parse_qs(urlparse(m.last_request.url).query),
+                {'q': [query], 'time_precision': ['ms'],
+                 'chunked': ['false']})
+
     def test_query_chunked(self):
         """Test chunked query for TestInfluxDBClient object."""
         cli = InfluxDBClient(database='db')
@@ -408,6 +775,30 @@ class TestInfluxDBClient(unittest.TestCase):
                 [example_object, example_object]
             )
 
+    def test_query_stream(self):
+        """Test streamed query for TestInfluxDBClient object."""
+        cli = InfluxDBClient(database='db')
+        example_object = {
+            'points': [[1415206250119, 40001, 667]],
+            'name': 'foo',
+            'columns': ['time', 'sequence_number', 'val']
+        }
+        example_response = \
+            json.dumps(example_object) + json.dumps(example_object)
+
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.GET,
+                "http://localhost:8086/db/db/series",
+                text=example_response
+            )
+
+            series = cli.query_stream('select * from foo')
+
+            self.assertEqual(m.last_request.qs['chunked'], ['true'])
+            self.assertEqual(next(series), example_object)
+            self.assertListEqual(list(series), [example_object])
+
     def test_query_chunked_unicode(self):
         """Test unicode chunked query for TestInfluxDBClient object."""
         cli = InfluxDBClient(database='db')
@@ -449,7 +840,7 @@ class TestInfluxDBClient(unittest.TestCase):
         """Test query with bad precision for TestInfluxDBClient."""
         cli = InfluxDBClient()
         with self.assertRaisesRegexp(
-            Exception,
+            ValueError,
             "Invalid time precision is given. \(use 's', 'm', 'ms' or 'u'\)"
         ):
             cli.query('select column_one from foo', time_precision='g')
@@ -848,6 +1239,104 @@ class TestInfluxDBClient(unittest.TestCase):
         cli = InfluxDBClient('host', 8086, 'username', 'password', 'db')
         cli.update_permission('admin', [])
 
+    def test_request_headers(self):
+        """Test requests ask for keep-alive and compressed responses."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.GET,
+                "http://localhost:8086/db",
+                text='[]'
+            )
+            cli = InfluxDBClient(database='db')
+            cli.get_list_database()
+
+            headers = m.last_request.headers
+            self.assertEqual(headers['Content-type'], 'application/json')
+            self.assertEqual(headers['Accept'], 'application/json')
+            self.assertEqual(headers['Connection'], 'keep-alive')
+            self.assertIn('gzip', headers['Accept-Encoding'])
+
+    def test_request_basic_auth(self):
+        """Test credentials are sent as basic auth, not in the URL."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.GET,
+                "http://localhost:8086/db",
+                text='[]'
+            )
+            cli = InfluxDBClient(username='usr', password='pwd')
+            cli.get_list_database()
+
+            self.assertEqual(m.last_request.headers['Authorization'],
+                             'Basic dXNyOnB3ZA==')
+            self.assertNotIn('u', m.last_request.qs)
+            self.assertNotIn('p', m.last_request.qs)
+
+            cli.switch_user('other', 'secret')
+            cli.get_list_database()
+
+            self.assertEqual(m.last_request.headers['Authorization'],
+                             'Basic b3RoZXI6c2VjcmV0')
+
+    def test_request_basic_auth_alter_password(self):
+        """Test changing the current user's password updates basic auth."""
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                requests_mock.POST,
+                "http://localhost:8086/db/db/users/usr"
+            )
+            m.register_uri(
+                requests_mock.GET,
+                "http://localhost:8086/db",
+                text='[]'
+            )
+            cli = InfluxDBClient(username='usr', password='pwd',
+                                 database='db')
+
+            cli.alter_database_user('usr', permissions=('^$', '.*'))
+            cli.get_list_database()
+            self.assertEqual(m.last_request.headers['Authorization'],
+                             'Basic dXNyOnB3ZA==')
+
+            cli.alter_database_user('usr', password='new')
+            cli.get_list_database()
+            self.assertEqual(m.last_request.headers['Authorization'],
+                             'Basic dXNyOm5ldw==')
+
+    def test_session_pool_size(self):
+        """Test the shared session keeps a pool sized for batch writes."""
+        for prefix in ('http://', 'https://'):
+            adapter = session.get_adapter(prefix + 'localhost:8086')
+            self.assertEqual(adapter._pool_maxsize, 32)
+            self.assertEqual(adapter._pool_connections, 32)
+
+    def test_custom_session(self):
+        """Test requests go through a session passed to the client."""
+        custom = requests.Session()
+        with mock.patch.object(custom, 'request') as request, \
+                mock.patch.object(session, 'request') as shared:
+            request.return_value = _build_response_object(
+                status_code=200, content='[]')
+            cli = InfluxDBClient(database='db', session=custom)
+            self.assertEqual(cli.get_list_database(), [])
+            request.assert_called_once()
+            shared.assert_not_called()
+
+    def test_context_manager_closes_session(self):
+        """Test leaving the client context closes its own session."""
+        own = requests.Session()
+        with mock.patch.object(own, 'close') as close:
+            with InfluxDBClient(database='db', session=own) as cli:
+                self.assertIsInstance(cli, InfluxDBClient)
+            close.assert_called_once_with()
+
+    def test_context_manager_keeps_shared_session(self):
+        """Test leaving the client context keeps the shared session open."""
+        with mock.patch.object(session, 'close') as close:
+            with InfluxDBClient(database='db') as cli:
+                self.assertIsInstance(cli, InfluxDBClient)
+            close.assert_not_called()
+
     @mock.patch('requests.Session.request')
     def test_request_retry(self, mock_request):
         """Test that two connection errors will be handled."""
@@ -85,6 +85,37 @@ class TestDataFrameClient(unittest.TestCase):
 
             self.assertListEqual(json.loads(m.last_request.body), points)
 
+    def test_write_points_from_dataframe_with_nan_and_text(self):
+        """Test NaN is sent as null in rows which also hold text."""
+        now = pd.Timestamp('1970-01-01 00:00+00:00')
+        dataframe = pd.DataFrame(data=[["1", float("NaN"), 1.0],
+                                       ["2", 2, 2.0]],
+                                 index=[now, now + timedelta(hours=1)],
+                                 columns=["column_one", "column_two",
+                                          "column_three"])
+        original = dataframe.copy()
+        points = [
+            {
+                "points": [
+                    ["1", None, 1.0, 0],
+                    ["2", 2, 2.0, 3600]
+                ],
+                "name": "foo",
+                "columns": ["column_one", "column_two", "column_three", "time"]
+            }
+        ]
+
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.POST,
+                           "http://localhost:8086/db/db/series")
+
+            cli = DataFrameClient(database='db')
+            cli.write_points({"foo": dataframe})
+
+            self.assertListEqual(json.loads(m.last_request.body), points)
+            # The caller's dataframe is not modified
+            assert_frame_equal(dataframe, original)
+
     def test_write_points_from_dataframe_in_batches(self):
         """Test write points from dataframe in batches."""
         now = pd.Timestamp('1970-01-01 00:00+00:00')
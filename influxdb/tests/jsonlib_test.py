@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""JSON helpers test."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import datetime
+import math
+import unittest
+
+from influxdb import _jsonlib
+
+
+class TestJsonLib(unittest.TestCase):
+    """Test the standard library backend, which is always available."""
+
+    dumps = staticmethod(_jsonlib._stdlib_dumps)
+    loads = staticmethod(_jsonlib._stdlib_loads)
+
+    def test_dumps_compact_bytes(self):
+        """Test dumps returns compact UTF-8 encoded bytes."""
+        self.assertEqual(
+            self.dumps({"name": "cpu", "values": [1, 2.5, "é"]}),
+            '{"name":"cpu","values":[1,2.5,"é"]}'.encode('utf-8')
+        )
+
+    def test_loads_bytes_and_str(self):
+        """Test loads accepts both bytes and str input."""
+        expected = {"results": [{"statement_id": 0}]}
+        self.assertEqual(
+            self.loads(b'{"results": [{"statement_id": 0}]}'), expected)
+        self.assertEqual(
+            self.loads('{"results": [{"statement_id": 0}]}'), expected)
+
+    def test_dumps_non_finite_as_null(self):
+        """Test NaN and infinity are encoded as null."""
+        self.assertEqual(
+            self.dumps({"points": [[1.5, float('nan')], (float('inf'),)]}),
+            b'{"points":[[1.5,null],[null]]}')
+
+    def test_dumps_datetime_fails(self):
+        """Test datetimes are rejected rather than silently converted."""
+        with self.assertRaises(TypeError):
+            self.dumps({"time": datetime.datetime(2020, 1, 1)})
+
+    def test_dumps_big_int(self):
+        """Test integers wider than 64 bits are encoded exactly."""
+        self.assertEqual(self.dumps([2 ** 70]), b'[1180591620717411303424]')
+
+    def test_dumps_int_keys(self):
+        """Test non-string keys are encoded as strings."""
+        self.assertEqual(self.dumps({1: 2}), b'{"1":2}')
+
+    def test_loads_non_finite(self):
+        """Test NaN and Infinity literals decode to floats."""
+        value, inf = self.loads(b'[NaN, Infinity]')
+        self.assertTrue(math.isnan(value))
+        self.assertEqual(inf, float('inf'))
+
+    def test_loads_invalid(self):
+        """Test invalid JSON raises ValueError."""
+        with self.assertRaises(ValueError):
+            self.loads(b'{"a": ')
+
+
+@unittest.skipIf(_jsonlib.orjson is None, "orjson not installed")
+class TestJsonLibOrjson(TestJsonLib):
+    """Run the same tests against the orjson backend."""
+
+    if _jsonlib.orjson is not None:
+        dumps = staticmethod(_jsonlib._orjson_dumps)
+        loads = staticmethod(_jsonlib._orjson_loads)
@@ -62,6 +62,13 @@ class TestResultSet(unittest.TestCase):
                          list(self.rs.get_points(
                              measurement='cpu_load_short')))
 
+    def test_get_points_unfiltered(self):
+        """Test get_points without filters yields points of all series."""
+        self.assertEqual(
+            [p['value'] for p in self.rs.get_points()],
+            [0.64, 0.65, 0.66]
+        )
+
     def test_filter_by_tags(self):
         """Test filter by tags in TestResultSet object."""
         expected = [